@@ -1,773 +1,412 @@
-from flask import Flask, render_template_string, request
-from joblib import load
+import time
+
+_import_started = time.perf_counter()
+
+import gc
+import html
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import Flask, g, jsonify, request
 import numpy as np
-import pandas as pd
-
-app = Flask(__name__)
-
-# Load optimized model bundle
-data = load('student_performance_model_optimized.joblib')
-model = data['model']
-columns = data['columns']
-categorical_cols = data['categorical_cols']
-label_encoders = data['label_encoders']
-
-# Enhanced HTML template with improved CSS and layout
-TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Student Performance Predictor</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            min-height: 100vh;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-            display: flex;
-            flex-direction: column;
-            position: relative;
-            overflow-x: hidden;
-        }
-
-        body::before {
-            content: '';
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: 
-                radial-gradient(circle at 20% 50%, rgba(120, 119, 198, 0.3) 0%, transparent 50%),
-                radial-gradient(circle at 80% 20%, rgba(255, 119, 198, 0.3) 0%, transparent 50%),
-                radial-gradient(circle at 40% 80%, rgba(120, 219, 255, 0.3) 0%, transparent 50%);
-            pointer-events: none;
-            z-index: -1;
-        }
-
-        .header {
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(20px);
-            border-bottom: 1px solid rgba(255, 255, 255, 0.2);
-            color: #fff;
-            padding: 40px 20px;
-            text-align: center;
-            position: relative;
-        }
-
-        .header::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(45deg, rgba(255, 255, 255, 0.1) 0%, rgba(255, 255, 255, 0.05) 100%);
-            pointer-events: none;
-        }
-
-        .header h1 {
-            font-size: 3.2em;
-            font-weight: 700;
-            letter-spacing: -0.02em;
-            margin-bottom: 12px;
-            text-shadow: 0 2px 20px rgba(0, 0, 0, 0.2);
-            position: relative;
-            z-index: 1;
-        }
-
-        .header .subtitle {
-            font-size: 1.2em;
-            font-weight: 400;
-            opacity: 0.9;
-            letter-spacing: 0.3px;
-            position: relative;
-            z-index: 1;
-        }
-
-        .container {
-            max-width: 520px;
-            margin: 50px auto;
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(20px);
-            padding: 45px 40px;
-            border-radius: 24px;
-            box-shadow: 
-                0 25px 50px rgba(0, 0, 0, 0.15),
-                0 0 0 1px rgba(255, 255, 255, 0.2);
-            position: relative;
-            border: 1px solid rgba(255, 255, 255, 0.3);
-        }
-
-        .container::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.4) 0%, rgba(255, 255, 255, 0.1) 100%);
-            border-radius: 24px;
-            pointer-events: none;
-        }
-
-        .container > * {
-            position: relative;
-            z-index: 1;
-        }
-
-        h2 {
-            text-align: center;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            font-size: 1.8em;
-            font-weight: 600;
-            margin-bottom: 35px;
-            letter-spacing: -0.01em;
-        }
-
-        form {
-            display: flex;
-            flex-direction: column;
-            gap: 24px;
-        }
-
-        .form-group {
-            display: flex;
-            flex-direction: column;
-            position: relative;
-        }
-
-        label {
-            font-weight: 500;
-            margin-bottom: 8px;
-            color: #374151;
-            font-size: 0.95em;
-            letter-spacing: 0.3px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-
-        .info-icon {
-            width: 16px;
-            height: 16px;
-            background: #6b7280;
-            border-radius: 50%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            color: white;
-            font-size: 11px;
-            font-weight: 600;
-            cursor: help;
-            position: relative;
-        }
-
-        .info-icon::after {
-            content: attr(data-tooltip);
-            position: absolute;
-            bottom: 125%;
-            left: 50%;
-            transform: translateX(-50%);
-            background: #1f2937;
-            color: white;
-            padding: 8px 12px;
-            border-radius: 8px;
-            font-size: 12px;
-            white-space: nowrap;
-            opacity: 0;
-            visibility: hidden;
-            transition: all 0.3s ease;
-            z-index: 1000;
-            pointer-events: none;
-            font-weight: 400;
-        }
-
-        .info-icon:hover::after {
-            opacity: 1;
-            visibility: visible;
-        }
-
-        input, select {
-            padding: 16px 18px;
-            border-radius: 12px;
-            border: 2px solid #e5e7eb;
-            font-size: 1em;
-            font-family: inherit;
-            background: rgba(255, 255, 255, 0.8);
-            backdrop-filter: blur(10px);
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            color: #374151;
-        }
-
-        input:focus, select:focus {
-            outline: none;
-            border-color: #667eea;
-            background: rgba(255, 255, 255, 0.95);
-            box-shadow: 
-                0 0 0 4px rgba(102, 126, 234, 0.1),
-                0 4px 12px rgba(102, 126, 234, 0.15);
-            transform: translateY(-2px);
-        }
-
-        input::placeholder {
-            color: #9ca3af;
-            font-weight: 400;
-        }
-
-        select {
-            cursor: pointer;
-            appearance: none;
-            background-image: url("data:image/svg+xml,%3csvg xmlns='http://www.w3.org/2000/svg' fill='none' viewBox='0 0 20 20'%3e%3cpath stroke='%236b7280' stroke-linecap='round' stroke-linejoin='round' stroke-width='1.5' d='m6 8 4 4 4-4'/%3e%3c/svg%3e");
-            background-position: right 12px center;
-            background-repeat: no-repeat;
-            background-size: 16px;
-            padding-right: 45px;
-        }
-
-        /* Input validation styles */
-        .form-group.error input,
-        .form-group.error select {
-            border-color: #ef4444;
-            background: rgba(239, 68, 68, 0.05);
-        }
-
-        .form-group.success input,
-        .form-group.success select {
-            border-color: #10b981;
-            background: rgba(16, 185, 129, 0.05);
-        }
-
-        .error-message {
-            color: #ef4444;
-            font-size: 0.85em;
-            margin-top: 6px;
-            display: none;
-            animation: slideDown 0.3s ease;
-        }
-
-        .form-group.error .error-message {
-            display: block;
-        }
-
-        .submit-btn {
-            margin-top: 20px;
-            padding: 18px 24px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #fff;
-            border: none;
-            border-radius: 12px;
-            font-size: 1.1em;
-            font-weight: 600;
-            cursor: pointer;
-            font-family: inherit;
-            letter-spacing: 0.3px;
-            box-shadow: 
-                0 8px 24px rgba(102, 126, 234, 0.3),
-                0 0 0 1px rgba(255, 255, 255, 0.2);
-            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-            position: relative;
-            overflow: hidden;
-        }
-
-        .submit-btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none !important;
-        }
-
-        .submit-btn::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: -100%;
-            width: 100%;
-            height: 100%;
-            background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.2), transparent);
-            transition: left 0.5s;
-        }
-
-        .submit-btn:hover:not(:disabled) {
-            transform: translateY(-3px);
-            box-shadow: 
-                0 12px 32px rgba(102, 126, 234, 0.4),
-                0 0 0 1px rgba(255, 255, 255, 0.3);
-        }
-
-        .submit-btn:hover:not(:disabled)::before {
-            left: 100%;
-        }
-
-        .submit-btn:active:not(:disabled) {
-            transform: translateY(-1px);
-        }
-
-        .result {
-            margin-top: 35px;
-            text-align: center;
-            font-size: 1.3em;
-            font-weight: 600;
-            padding: 24px 20px;
-            border-radius: 16px;
-            background: linear-gradient(135deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%);
-            border: 2px solid rgba(102, 126, 234, 0.2);
-            backdrop-filter: blur(10px);
-            color: #374151;
-            box-shadow: 0 8px 24px rgba(102, 126, 234, 0.1);
-            position: relative;
-            animation: slideUp 0.5s ease-out;
-        }
-
-        .result::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(135deg, rgba(255, 255, 255, 0.3) 0%, rgba(255, 255, 255, 0.1) 100%);
-            border-radius: 14px;
-            pointer-events: none;
-        }
-
-        .result > * {
-            position: relative;
-            z-index: 1;
-        }
-
-        .result b {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }
-
-        .progress-bar {
-            width: 100%;
-            height: 6px;
-            background: rgba(0, 0, 0, 0.1);
-            border-radius: 3px;
-            margin: 20px 0;
-            overflow: hidden;
-        }
-
-        .progress-fill {
-            height: 100%;
-            background: linear-gradient(90deg, #667eea, #764ba2);
-            width: 0%;
-            transition: width 0.3s ease;
-            border-radius: 3px;
-        }
-
-        .form-summary {
-            background: rgba(102, 126, 234, 0.05);
-            border: 1px solid rgba(102, 126, 234, 0.1);
-            border-radius: 12px;
-            padding: 16px;
-            margin-bottom: 24px;
-            display: none;
-        }
-
-        .form-summary.show {
-            display: block;
-            animation: slideDown 0.3s ease;
-        }
-
-        .form-summary h3 {
-            color: #667eea;
-            margin-bottom: 8px;
-            font-size: 1.1em;
-        }
-
-        .summary-item {
-            display: flex;
-            justify-content: space-between;
-            margin-bottom: 4px;
-            font-size: 0.9em;
-            color: #6b7280;
-        }
-
-        @keyframes slideUp {
-            from {
-                opacity: 0;
-                transform: translateY(20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-
-        @keyframes slideDown {
-            from {
-                opacity: 0;
-                transform: translateY(-10px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-
-        /* Enhanced mobile responsiveness */
-        @media (max-width: 640px) {
-            .header {
-                padding: 30px 15px;
-            }
-            
-            .header h1 {
-                font-size: 2.2em;
-            }
-            
-            .header .subtitle {
-                font-size: 1em;
-            }
-            
-            .container {
-                margin: 30px 15px;
-                padding: 30px 25px;
-                border-radius: 20px;
-            }
-            
-            h2 {
-                font-size: 1.5em;
-                margin-bottom: 25px;
-            }
-            
-            form {
-                gap: 20px;
-            }
-            
-            input, select {
-                padding: 14px 16px;
-            }
-            
-            .submit-btn {
-                padding: 16px 20px;
-                font-size: 1em;
-            }
-            
-            .result {
-                font-size: 1.1em;
-                padding: 20px 16px;
-            }
-        }
-
-        @media (max-width: 480px) {
-            .header h1 {
-                font-size: 1.8em;
-            }
-            
-            .container {
-                margin: 20px 10px;
-                padding: 25px 20px;
-            }
-        }
-
-        /* Loading animation for form submission */
-        .submit-btn.loading {
-            pointer-events: none;
-            opacity: 0.8;
-        }
-
-        .submit-btn.loading::after {
-            content: '';
-            position: absolute;
-            width: 20px;
-            height: 20px;
-            margin: auto;
-            border: 2px solid transparent;
-            border-top-color: #ffffff;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-        }
-
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>Student Performance Predictor</h1>
-        <div class="subtitle">Predict if a student will pass based on their profile</div>
-    </div>
-    
-    <div class="container">
-        <h2>Enter Student Details</h2>
-        
-        <div class="progress-bar">
-            <div class="progress-fill" id="progressFill"></div>
-        </div>
-        
-        <form method="post" id="predictionForm">
-            <div class="form-group">
-                <label for="study-hours">
-                    Study Hours per Week
-                    <span class="info-icon" data-tooltip="Average hours spent studying per week">?</span>
-                </label>
-                <input type="number" step="0.1" min="0" max="168" name="Study Hours per Week" id="study-hours" required placeholder="e.g. 12.5">
-                <div class="error-message">Please enter a valid number of study hours (0-168)</div>
-            </div>
-            
-            <div class="form-group">
-                <label for="attendance">
-                    Attendance Rate
-                    <span class="info-icon" data-tooltip="Percentage of classes attended (0-100%)">?</span>
-                </label>
-                <input type="number" step="0.1" min="0" max="100" name="Attendance Rate" id="attendance" required placeholder="e.g. 85.0">
-                <div class="error-message">Please enter a valid attendance rate (0-100%)</div>
-            </div>
-            
-            <div class="form-group">
-                <label for="grades">
-                    Previous Grades
-                    <span class="info-icon" data-tooltip="Average of previous academic grades (0-100)">?</span>
-                </label>
-                <input type="number" step="0.1" min="0" max="100" name="Previous Grades" id="grades" required placeholder="e.g. 75.0">
-                <div class="error-message">Please enter valid grades (0-100)</div>
-            </div>
-            
-            <div class="form-group">
-                <label for="extracurricular">
-                    Participation in Extracurricular Activities
-                    <span class="info-icon" data-tooltip="Active participation in sports, clubs, or other activities">?</span>
-                </label>
-                <select name="Participation in Extracurricular Activities" id="extracurricular" required>
-                    <option value="" disabled selected>Select participation level</option>
-                    <option value="Yes">Yes</option>
-                    <option value="No">No</option>
-                </select>
-                <div class="error-message">Please select participation level</div>
-            </div>
-            
-            <div class="form-group">
-                <label for="parent-education">
-                    Parent Education Level
-                    <span class="info-icon" data-tooltip="Highest education level of parents/guardians">?</span>
-                </label>
-                <select name="Parent Education Level" id="parent-education" required>
-                    <option value="" disabled selected>Select education level</option>
-                    <option value="High School">High School</option>
-                    <option value="Associate">Associate</option>
-                    <option value="Bachelor">Bachelor</option>
-                    <option value="Master">Master</option>
-                    <option value="Doctorate">Doctorate</option>
-                </select>
-                <div class="error-message">Please select parent education level</div>
-            </div>
-            
-            <div class="form-summary" id="formSummary">
-                <h3>Summary</h3>
-                <div id="summaryContent"></div>
-            </div>
-            
-            <button type="submit" class="submit-btn" id="submitBtn" disabled>
-                <span>Predict Performance</span>
-            </button>
-        </form>
-        
-        <div class="result" id="result" style="display: none;">
-            <span>Prediction: <b id="predictionText"></b></span>
-        </div>
-    </div>
-
-    <script>
-        const form = document.getElementById('predictionForm');
-        const progressFill = document.getElementById('progressFill');
-        const submitBtn = document.getElementById('submitBtn');
-        const formSummary = document.getElementById('formSummary');
-        const summaryContent = document.getElementById('summaryContent');
-        const result = document.getElementById('result');
-        const predictionText = document.getElementById('predictionText');
-        
-        const fields = form.querySelectorAll('input[required], select[required]');
-        let filledFields = 0;
-
-        // Validation functions
-        function validateStudyHours(value) {
-            return value >= 0 && value <= 168;
-        }
-
-        function validateAttendance(value) {
-            return value >= 0 && value <= 100;
-        }
-
-        function validateGrades(value) {
-            return value >= 0 && value <= 100;
-        }
-
-        function validateField(field) {
-            const group = field.closest('.form-group');
-            const value = parseFloat(field.value);
-            let isValid = true;
-
-            if (field.type === 'number' && field.value !== '') {
-                if (field.id === 'study-hours') {
-                    isValid = validateStudyHours(value);
-                } else if (field.id === 'attendance') {
-                    isValid = validateAttendance(value);
-                } else if (field.id === 'grades') {
-                    isValid = validateGrades(value);
-                }
-            }
-
-            if (field.type === 'number' && field.value === '') {
-                isValid = false;
-            }
-
-            if (field.tagName === 'SELECT' && field.value === '') {
-                isValid = false;
-            }
-
-            // Update visual feedback
-            group.classList.remove('error', 'success');
-            if (field.value !== '') {
-                group.classList.add(isValid ? 'success' : 'error');
-            }
-
-            return isValid;
-        }
-
-        function updateProgress() {
-            filledFields = 0;
-            let allValid = true;
-
-            fields.forEach(field => {
-                if (field.value !== '' && validateField(field)) {
-                    filledFields++;
-                } else if (field.value !== '') {
-                    allValid = false;
-                }
-            });
-
-            const progress = (filledFields / fields.length) * 100;
-            progressFill.style.width = progress + '%';
-            
-            // Enable submit button only if all fields are filled and valid
-            submitBtn.disabled = filledFields !== fields.length || !allValid;
-            
-            // Show summary when form is complete
-            if (filledFields === fields.length && allValid) {
-                updateSummary();
-                formSummary.classList.add('show');
-            } else {
-                formSummary.classList.remove('show');
-            }
-        }
-
-        function updateSummary() {
-            const studyHours = document.getElementById('study-hours').value;
-            const attendance = document.getElementById('attendance').value;
-            const grades = document.getElementById('grades').value;
-            const extracurricular = document.getElementById('extracurricular').value;
-            const parentEducation = document.getElementById('parent-education').value;
-
-            summaryContent.innerHTML = `
-                <div class="summary-item">
-                    <span>Study Hours/Week:</span>
-                    <span>${studyHours}</span>
-                </div>
-                <div class="summary-item">
-                    <span>Attendance Rate:</span>
-                    <span>${attendance}%</span>
-                </div>
-                <div class="summary-item">
-                    <span>Previous Grades:</span>
-                    <span>${grades}</span>
-                </div>
-                <div class="summary-item">
-                    <span>Extracurricular:</span>
-                    <span>${extracurricular}</span>
-                </div>
-                <div class="summary-item">
-                    <span>Parent Education:</span>
-                    <span>${parentEducation}</span>
-                </div>
-            `;
-        }
-
-        // Add event listeners
-        fields.forEach(field => {
-            field.addEventListener('input', updateProgress);
-            field.addEventListener('blur', () => validateField(field));
-            field.addEventListener('change', updateProgress);
-        });
-
-        // Form submission
-        form.addEventListener('submit', function(e) {
-            e.preventDefault();
-            
-            const button = submitBtn;
-            button.classList.add('loading');
-            button.innerHTML = '<span>Predicting...</span>';
-            
-            // Simulate API call
-            setTimeout(() => {
-                // Mock prediction logic
-                const studyHours = parseFloat(document.getElementById('study-hours').value);
-                const attendance = parseFloat(document.getElementById('attendance').value);
-                const grades = parseFloat(document.getElementById('grades').value);
-                const extracurricular = document.getElementById('extracurricular').value;
-                
-                // Simple mock prediction
-                let score = 0;
-                if (studyHours > 10) score += 25;
-                if (attendance > 80) score += 25;
-                if (grades > 70) score += 25;
-                if (extracurricular === 'Yes') score += 25;
-                
-                const prediction = score >= 75 ? 'Pass' : 'Fail';
-                
-                predictionText.textContent = prediction;
-                result.style.display = 'block';
-                
-                button.classList.remove('loading');
-                button.innerHTML = '<span>Predict Performance</span>';
-            }, 2000);
-        });
-
-        // Initial progress update
-        updateProgress();
-    </script>
-</body>
-</html>
-'''
+
+from assets import StaticAssets
+from audit import AuditLog
+from batching import MicroBatcher
+from cache import PredictionCache
+from drift import load_baseline
+from metrics import Metrics
+from registry import ModelRegistry, ModelWatcher
+from serving import ServingModel
+from whatif import sweep
+
+# static/ is served by the route below (fingerprinted, precompressed), not Flask's default one
+app = Flask(__name__, static_folder=None)
+
+# Optimized model bundle to serve (or a precompiled one from forest.py, which needs no scikit-learn)
+MODEL_PATH = os.environ.get('MODEL_PATH', 'student_performance_model_optimized.joblib')
+# With MODEL_REGISTRY set, serve the registry's current version instead and hot-reload
+# whenever it changes (checked every MODEL_WATCH_INTERVAL seconds)
+MODEL_REGISTRY = os.environ.get('MODEL_REGISTRY')
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+registry = ModelRegistry(MODEL_REGISTRY) if MODEL_REGISTRY else None
+# eager: load at import; with gunicorn --preload, forked workers share the model copy-on-write
+# lazy: load on the first request (or /ready probe); background: load in a thread at import
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'eager')
+
+# Input drift monitoring uses the baseline train_model.py embeds in the bundle; older bundles
+# can get one from drift.py via DRIFT_BASELINE. Counts are halved every DRIFT_WINDOW rows.
+DRIFT_BASELINE = os.environ.get('DRIFT_BASELINE')
+DRIFT_WINDOW = int(os.environ.get('DRIFT_WINDOW', 100_000))
+drift_options = {'drift_baseline': load_baseline(DRIFT_BASELINE) if DRIFT_BASELINE else None,
+                 'drift_window': DRIFT_WINDOW}
+
+# Startup timings, reported by /ready so regressions are easy to spot
+startup = {'import_seconds': None, 'load_seconds': None, 'warmup_seconds': None, 'first_request_seconds': None}
+_serving = None
+_serving_lock = threading.Lock()
+_watcher_pid = None
+
+def load_version(version):
+    # Load and smoke-test one registry version; raises if it can't serve
+    serving = ServingModel.load(registry.path(version), version=version, **drift_options)
+    serving.warmup()
+    return serving
+
+def swap_model(serving):
+    # A single reference assignment: requests already holding the old model finish on it
+    global _serving
+    _serving = serving
+
+def _start_watcher():
+    # Threads don't survive fork, so each (pre-forked) worker process starts its own watcher
+    global _watcher_pid
+    with _serving_lock:
+        if _watcher_pid != os.getpid():
+            ModelWatcher(registry, load_version, swap_model, current_version=_serving.version,
+                         interval=MODEL_WATCH_INTERVAL, logger=app.logger).start()
+            _watcher_pid = os.getpid()
+
+def get_model():
+    # Load and warm up the model exactly once; concurrent first callers wait for the same load
+    global _serving
+    if _serving is None:
+        with _serving_lock:
+            if _serving is None:
+                start = time.perf_counter()
+                if registry is not None:
+                    version = registry.current_version()
+                    if version is None:
+                        raise RuntimeError(f'Model registry {MODEL_REGISTRY} has no current version')
+                    serving = ServingModel.load(registry.path(version), version=version, **drift_options)
+                else:
+                    serving = ServingModel.load(MODEL_PATH, **drift_options)
+                startup['load_seconds'] = time.perf_counter() - start
+                startup['warmup_seconds'] = serving.warmup()
+                _serving = serving
+                app.logger.info('Loaded model %s in %.3fs (warmup %.4fs)', serving.version,
+                                startup['load_seconds'], startup['warmup_seconds'])
+    if registry is not None and _watcher_pid != os.getpid():
+        _start_watcher()
+    return _serving
+
+if MODEL_LOADING == 'eager':
+    get_model()
+    # Move everything loaded so far out of the GC's reach, so collections in forked
+    # workers don't touch (and un-share) the preloaded pages
+    gc.freeze()
+elif MODEL_LOADING == 'background':
+    threading.Thread(target=get_model, name='model-loader', daemon=True).start()
+
+# Memoize repeated student profiles (PREDICTION_CACHE_SIZE=0 disables it). Requests with more
+# than PREDICTION_CACHE_MAX_BATCH rows skip it: keying them costs more than it saves, and their
+# rows would only evict the profiles that do repeat
+prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 300)),
+)
+PREDICTION_CACHE_MAX_BATCH = int(os.environ.get('PREDICTION_CACHE_MAX_BATCH', 1000))
+
+# Per-stage timings, counters and component stats for /metrics.
+# METRICS=auto (default) starts recording at the first scrape, on records from startup,
+# off disables the route; unscraped workers only pay a flag check per stage
+METRICS = os.environ.get('METRICS', 'auto')
+metrics = Metrics('student_predictor', enabled=METRICS == 'on')
+
+# Audit trail of every prediction (off unless AUDIT_LOG_DIR is set). Requests only append to a
+# bounded buffer; a background thread writes it out in batches to rotating gzipped JSON-lines files.
+# AUDIT_LOG_OVERFLOW says what a request does when the buffer is full: block, drop_newest or drop_oldest
+AUDIT_LOG_DIR = os.environ.get('AUDIT_LOG_DIR')
+audit_log = None
+if AUDIT_LOG_DIR:
+    audit_log = AuditLog(
+        AUDIT_LOG_DIR,
+        capacity=int(os.environ.get('AUDIT_LOG_CAPACITY', 10_000)),
+        batch_size=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 1000)),
+        flush_interval=float(os.environ.get('AUDIT_LOG_FLUSH_SECONDS', 1)),
+        max_file_bytes=int(float(os.environ.get('AUDIT_LOG_FILE_MB', 64)) * 2 ** 20),
+        overflow=os.environ.get('AUDIT_LOG_OVERFLOW', 'block'),
+    )
+
+# Page, stylesheet and script from static/, compressed and hashed once at import
+static_assets = StaticAssets()
+
+def score_queued(items):
+    # Queued (model, row) pairs; each row is scored by the model its request started on
+    results = [None] * len(items)
+    groups = {}
+    for i, (serving, _) in enumerate(items):
+        groups.setdefault(id(serving), (serving, []))[1].append(i)
+    for serving, indices in groups.values():
+        metrics.observe_batch(len(indices))
+        scored = serving.score(np.stack([items[i][1] for i in indices]))
+        for i, result in zip(indices, scored):
+            results[i] = result
+    return results
+
+# Optionally coalesce concurrent single-record requests into one model call
+# (MICROBATCH=1; trade up to MICROBATCH_MAX_WAIT_MS of latency for throughput).
+# A request whose batch takes longer than MICROBATCH_TIMEOUT_MS is scored on its own instead
+micro_batcher = None
+if os.environ.get('MICROBATCH', '0') == '1':
+    micro_batcher = MicroBatcher(
+        score_queued,
+        max_batch_size=int(os.environ.get('MICROBATCH_MAX_SIZE', 64)),
+        max_wait=float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2)) / 1000,
+        timeout=float(os.environ.get('MICROBATCH_TIMEOUT_MS', 5000)) / 1000,
+    )
+
+def predict_rows(serving, X):
+    # Every served row counts towards drift (a queue append); only cache misses reach the model
+    if serving.drift is not None:
+        serving.drift.update(X)
+    cached = prediction_cache.maxsize > 0 and len(X) <= PREDICTION_CACHE_MAX_BATCH
+    if cached:
+        with metrics.time('cache'):
+            keys = [PredictionCache.key(row) for row in X]
+            results = [prediction_cache.get(key, serving) for key in keys]
+            misses = [i for i, result in enumerate(results) if result is None]
+    else:
+        misses = list(range(len(X)))
+    with metrics.time('predict'):
+        if len(misses) == 1 and micro_batcher is not None:
+            try:
+                scored = [micro_batcher.predict((serving, X[misses[0]]))]
+            except FutureTimeoutError:
+                # Future.result() raises this one; it is only the builtin TimeoutError from Python 3.11
+                scored = serving.score(X[misses])
+        elif misses:
+            metrics.observe_batch(len(misses))
+            scored = serving.score(X[misses] if cached else X)
+        else:
+            scored = []
+    if not cached:
+        return scored
+    for i, result in zip(misses, scored):
+        results[i] = result
+        prediction_cache.put(keys[i], result, serving)
+    return results
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_first_request(response):
+    if startup['first_request_seconds'] is None and request.endpoint != 'ready':
+        startup['first_request_seconds'] = time.perf_counter() - g.request_started
+        app.logger.info('First request served in %.4fs', startup['first_request_seconds'])
+    return response
+
+@app.route('/ready')
+def ready():
+    # Readiness probe: 503 until the model is loaded and warmed up
+    if _serving is None and MODEL_LOADING != 'lazy':
+        return jsonify(ready=False, startup=startup), 503
+    serving = get_model()
+    return jsonify(ready=True, model_version=serving.version, startup=startup)
+
+def collect_component_metrics():
+    cache_stats = prediction_cache.stats()
+    families = [
+        ('student_predictor_cache_hits_total', 'counter', 'Prediction cache hits', [({}, cache_stats['hits'])]),
+        ('student_predictor_cache_misses_total', 'counter', 'Prediction cache misses', [({}, cache_stats['misses'])]),
+        ('student_predictor_cache_evictions_total', 'counter', 'Prediction cache LRU evictions',
+         [({}, cache_stats['evictions'])]),
+        ('student_predictor_cache_entries', 'gauge', 'Prediction cache entries', [({}, cache_stats['size'])]),
+        ('student_predictor_cache_hit_ratio', 'gauge', 'Prediction cache hit rate since start',
+         [({}, cache_stats['hit_rate'])]),
+    ]
+    if micro_batcher is not None:
+        batch_stats = micro_batcher.stats()
+        families += [
+            ('student_predictor_microbatch_batches_total', 'counter', 'Micro-batches flushed',
+             [({}, batch_stats['batches'])]),
+            ('student_predictor_microbatch_items_total', 'counter', 'Records scored through micro-batches',
+             [({}, batch_stats['items'])]),
+        ]
+    if _serving is not None:
+        families.append(('student_predictor_model_info', 'gauge', 'Model version being served',
+                         [({'version': _serving.version}, 1)]))
+        if _serving.drift is not None:
+            drift = _serving.drift.scores()
+            families += [
+                ('student_predictor_drift_psi', 'gauge', 'Population stability index of served inputs vs training',
+                 [({'feature': col}, value) for col, value in drift['psi'].items()]),
+                ('student_predictor_drift_rows', 'gauge', 'Served rows in the drift window', [({}, drift['rows'])]),
+            ]
+    if audit_log is not None:
+        audit_stats = audit_log.stats()
+        families += [
+            ('student_predictor_audit_written_total', 'counter', 'Predictions written to the audit log',
+             [({}, audit_stats['written'])]),
+            ('student_predictor_audit_dropped_total', 'counter', 'Predictions dropped because the audit buffer was full',
+             [({}, audit_stats['dropped'])]),
+            ('student_predictor_audit_write_errors_total', 'counter', 'Audit log batches that failed to write',
+             [({}, audit_stats['write_errors'])]),
+            ('student_predictor_audit_queued', 'gauge', 'Predictions waiting in the audit buffer',
+             [({}, audit_stats['queued'])]),
+        ]
+    return families
+
+metrics.add_collector(collect_component_metrics)
+
+def drift_report():
+    # Returns (body, status) for /drift
+    serving = get_model()
+    if serving.drift is None:
+        return {'error': 'No drift baseline for this model (retrain or set DRIFT_BASELINE)'}, 404
+    return {'model_version': serving.version, **serving.drift.scores()}, 200
+
+@app.route('/drift')
+def drift_endpoint():
+    body, status = drift_report()
+    return jsonify(body), status
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text exposition
+    if METRICS == 'off':
+        return 'Metrics are disabled (METRICS=off)\n', 404, {'Content-Type': 'text/plain'}
+    metrics.enabled = True
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def predict_form(form):
+    # Score one submitted form; returns ((Pass/Fail, pass probability), model version)
+    serving = get_model()
+    # Collect form data
+    input_data = {col: form[col] for col in serving.columns}
+    # Prepare data for model
+    with metrics.time('encode'):
+        X = serving.encoder.encode([input_data])
+    # Predict
+    results = predict_rows(serving, X)
+    if audit_log is not None:
+        audit_log.log(serving.version, 'form', serving.columns, [input_data], results)
+    return results[0], serving.version
+
+def result_page(text):
+    # index.html with the result box shown and filled in, for clients without JavaScript
+    return static_assets.render('index.html', {
+        b'id="result" style="display: none;"': b'id="result"',
+        b'<b id="predictionText"></b>': f'<b id="predictionText">{html.escape(text)}</b>'.encode(),
+    })
+
+def form_page(form):
+    # Returns (status, page, headers) for a form post; bad input shows its error in the page
+    try:
+        (label, probability), version = predict_form(form)
+    except KeyError as exc:
+        status, text, headers = 400, f'Missing form field: {exc.args[0]}', {}
+    except ValueError as exc:
+        status, text, headers = 400, str(exc), {}
+    else:
+        status, text, headers = 200, f'{label} ({round(probability * 100)}% chance of passing)', {
+            'X-Model-Version': version}
+    with metrics.time('render'):
+        page = result_page(text)
+    return status, page, {'Content-Type': 'text/html; charset=utf-8', 'Cache-Control': 'no-store', **headers}
+
+def predict_payload(records, explain=False):
+    # Validate and score a decoded JSON body; returns (response body, status code)
+    # With explain, per-feature contributions to the pass probability are added
+    # (null for models that cannot explain, e.g. lookup tables or linear bundles)
+    # Accept a JSON array of student records (a single object is treated as a batch of one)
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        return {'error': 'Expected a JSON array of student records'}, 400
+    serving = get_model()
+    for i, record in enumerate(records):
+        missing = [col for col in serving.columns if col not in record]
+        if missing:
+            return {'error': f'Record {i} is missing fields: {", ".join(missing)}'}, 400
+    if not records:
+        return {'predictions': [], 'probabilities': [], 'model_version': serving.version}, 200
+    try:
+        with metrics.time('encode'):
+            X = serving.encoder.encode(records)
+    except ValueError as exc:
+        return {'error': str(exc)}, 400
+    results = predict_rows(serving, X)
+    if audit_log is not None:
+        audit_log.log(serving.version, 'api', serving.columns, records, results)
+    body = {
+        'predictions': [label for label, _ in results],
+        'probabilities': [p for _, p in results],
+        'model_version': serving.version,
+    }
+    if explain and serving.explainable:
+        with metrics.time('explain'):
+            body['baseline'], body['contributions'] = serving.explain(X)
+    elif explain:
+        body['baseline'], body['contributions'] = None, None
+    return body, 200
+
+def whatif_payload(payload):
+    # {"student": {...}, "vary": {feature: grid, ...}} -> (response body, status code).
+    # The whole grid is scored in one model call; sweeps skip the cache, drift and audit log
+    if not isinstance(payload, dict) or not isinstance(payload.get('student'), dict):
+        return {'error': 'Expected {"student": {...}, "vary": {feature: grid}}'}, 400
+    serving = get_model()
+    record = payload['student']
+    missing = [col for col in serving.columns if col not in record]
+    if missing:
+        return {'error': f'Student is missing fields: {", ".join(missing)}'}, 400
+    try:
+        with metrics.time('predict'):
+            body = sweep(serving, record, payload.get('vary'))
+    except ValueError as exc:
+        return {'error': str(exc)}, 400
+    body['model_version'] = serving.version
+    return body, 200
+
+def static_response(name):
+    response = static_assets.response(name, request.headers.get('Accept-Encoding'),
+                                      request.headers.get('If-None-Match'), request.args.get('v'))
+    if response is None:
+        return jsonify(error='Not found'), 404
+    status, body, headers = response
+    return body, status, headers
+
+@app.route('/static/<name>')
+def static_file(name):
+    return static_response(name)
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    result = None
-    if request.method == 'POST':
-        # Collect form data
-        input_data = {col: request.form[col] for col in columns}
-        # Prepare data for model
-        X = pd.DataFrame([input_data])
-        # Convert numerics
-        for col in X.columns:
-            if col not in categorical_cols:
-                X[col] = pd.to_numeric(X[col], errors='coerce')
-        # Encode categoricals
-        for col in categorical_cols:
-            le = label_encoders[col]
-            X[col] = le.transform(X[col])
-        # Fill any missing values (shouldn't be any from form)
-        X = X.fillna(0)
-        # Predict
-        pred = model.predict(X)[0]
-        result = 'Pass' if pred == 1 else 'Fail'
-    return render_template_string(TEMPLATE, result=result)
+    metrics.count_request('index')
+    if request.method == 'GET':
+        return static_response('index.html')
+    # Form posts (browsers without JavaScript) get the page back with the prediction filled in;
+    # with JavaScript the page calls /api/predict instead
+    with metrics.time('parse'):
+        form = request.form
+    status, page, headers = form_page(form)
+    return page, status, headers
+
+@app.route('/api/predict', methods=['POST'])
+def api_predict():
+    metrics.count_request('api_predict')
+    with metrics.time('parse'):
+        records = request.get_json(silent=True)
+    body, status = predict_payload(records, explain=request.args.get('explain') == '1')
+    with metrics.time('serialize'):
+        response = jsonify(body)
+    return response, status
+
+@app.route('/api/whatif', methods=['POST'])
+def api_whatif():
+    metrics.count_request('api_whatif')
+    with metrics.time('parse'):
+        payload = request.get_json(silent=True)
+    body, status = whatif_payload(payload)
+    with metrics.time('serialize'):
+        response = jsonify(body)
+    return response, status
+
+startup['import_seconds'] = time.perf_counter() - _import_started
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
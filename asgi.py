@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, parse_qsl
+
+import app as flask_app
+
+# ASGI entry point serving the same routes as the Flask app:
+#
+#   uvicorn asgi:application --workers 4
+#
+# Reading request bodies, parsing and writing responses happen on the event loop;
+# encoding and model calls run in a bounded thread pool, so a slow client or a big
+# batch body never blocks other requests. Model loading, caching, micro-batching and
+# hot reload are shared with app.py.
+
+# Threads running encode + predict, and how many requests may wait for one
+INFERENCE_THREADS = int(os.environ.get('ASGI_INFERENCE_THREADS', os.cpu_count() or 1))
+MAX_PENDING = int(os.environ.get('ASGI_MAX_PENDING', 256))
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 16 * 1024 * 1024))
+
+_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+_pending = None
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+async def run_inference(func, *args):
+    # Bounded offload: past MAX_PENDING waiting requests, new ones queue here instead of in the pool
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(MAX_PENDING)
+    async with _pending:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestTooLarge
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def send_response(send, status, body, content_type, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode()),
+                    *[(name.encode(), value.encode()) for name, value in headers]],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status, payload):
+    await send_response(send, status, json.dumps(payload).encode(), 'application/json')
+
+
+def request_header(scope, name):
+    name = name.encode()
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return ''
+
+
+async def send_static(scope, send, name):
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    response = flask_app.static_assets.response(
+        name, request_header(scope, 'accept-encoding'),
+        request_header(scope, 'if-none-match'), query.get('v', [None])[0])
+    if response is None:
+        return await send_json(send, 404, {'error': 'Not found'})
+    code, body, asset_headers = response
+    await send_response(send, code, body, asset_headers.pop('Content-Type'),
+                        [(name.lower(), value) for name, value in asset_headers.items()])
+
+
+async def static(scope, receive, send):
+    await send_static(scope, send, scope['path'][len('/static/'):])
+
+
+async def index(scope, receive, send):
+    flask_app.metrics.count_request('index')
+    if scope['method'] == 'GET':
+        return await send_static(scope, send, 'index.html')
+    form = dict(parse_qsl((await read_body(receive)).decode('utf-8', 'replace'), keep_blank_values=True))
+    status, page, headers = await run_inference(flask_app.form_page, form)
+    await send_response(send, status, page, headers.pop('Content-Type'),
+                        [(name.lower(), value) for name, value in headers.items()])
+
+
+async def api_predict(scope, receive, send):
+    flask_app.metrics.count_request('api_predict')
+    try:
+        records = json.loads(await read_body(receive))
+    except ValueError:
+        records = None
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    body, status = await run_inference(flask_app.predict_payload, records, query.get('explain') == ['1'])
+    await send_json(send, status, body)
+
+
+async def api_whatif(scope, receive, send):
+    flask_app.metrics.count_request('api_whatif')
+    try:
+        payload = json.loads(await read_body(receive))
+    except ValueError:
+        payload = None
+    body, status = await run_inference(flask_app.whatif_payload, payload)
+    await send_json(send, status, body)
+
+
+async def ready(scope, receive, send):
+    if flask_app._serving is None and flask_app.MODEL_LOADING != 'lazy':
+        return await send_json(send, 503, {'ready': False, 'startup': flask_app.startup})
+    serving = await run_inference(flask_app.get_model)
+    await send_json(send, 200, {'ready': True, 'model_version': serving.version, 'startup': flask_app.startup})
+
+
+async def metrics(scope, receive, send):
+    if flask_app.METRICS == 'off':
+        return await send_json(send, 404, {'error': 'Metrics are disabled (METRICS=off)'})
+    flask_app.metrics.enabled = True
+    await send_response(send, 200, flask_app.metrics.render().encode(), 'text/plain; version=0.0.4; charset=utf-8')
+
+
+async def drift(scope, receive, send):
+    body, status = await run_inference(flask_app.drift_report)
+    await send_json(send, status, body)
+
+
+ROUTES = {
+    '/': (index, ('GET', 'POST')),
+    '/api/predict': (api_predict, ('POST',)),
+    '/api/whatif': (api_whatif, ('POST',)),
+    '/ready': (ready, ('GET',)),
+    '/metrics': (metrics, ('GET',)),
+    '/drift': (drift, ('GET',)),
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Load and warm the model off the loop before accepting traffic
+            await run_inference(flask_app.get_model)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    started = time.perf_counter()
+    await dispatch(scope, receive, send)
+    # Same startup timing app.py records in its after_request hook, reported by /ready
+    if flask_app.startup['first_request_seconds'] is None and scope['path'] != '/ready':
+        flask_app.startup['first_request_seconds'] = time.perf_counter() - started
+        flask_app.app.logger.info('First request served in %.4fs', flask_app.startup['first_request_seconds'])
+
+
+async def dispatch(scope, receive, send):
+    route = ROUTES.get(scope['path'])
+    if route is None and scope['path'].startswith('/static/'):
+        route = (static, ('GET',))
+    if route is None:
+        return await send_json(send, 404, {'error': 'Not found'})
+    handler, methods = route
+    if scope['method'] not in methods:
+        return await send_json(send, 405, {'error': 'Method not allowed'})
+    try:
+        await handler(scope, receive, send)
+    except RequestTooLarge:
+        await send_json(send, 413, {'error': f'Request body exceeds {MAX_BODY_BYTES} bytes'})
@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Static front end (static/): read, fingerprinted and compressed once at startup.
+# HTML references to /static/<name> are rewritten to /static/<name>?v=<hash>, and a
+# request carrying the current hash is cached for a year as immutable; everything else
+# is revalidated with its ETag. Responses are framework-neutral (status, body, headers)
+# so app.py and asgi.py serve them the same way.
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def _digest(body):
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def accepted_encodings(header):
+    # Codings listed in Accept-Encoding without q=0
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return accepted
+
+
+class Asset:
+    def __init__(self, body, content_type):
+        self.content_type = content_type
+        self.version = _digest(body)
+        # Each stored encoding is its own representation with its own strong ETag
+        self.representations = {'identity': (body, f'"{self.version}"')}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.representations['gzip'] = (compressed, f'"{self.version}-gzip"')
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.representations['br'] = (compressed, f'"{self.version}-br"')
+
+
+class StaticAssets:
+    def __init__(self, directory=STATIC_DIR):
+        raw = {}
+        for name in sorted(os.listdir(directory)):
+            extension = os.path.splitext(name)[1]
+            if extension in CONTENT_TYPES:
+                with open(os.path.join(directory, name), 'rb') as f:
+                    raw[name] = f.read()
+        self.assets = {}
+        for name, body in raw.items():
+            if not name.endswith('.html'):
+                self.assets[name] = Asset(body, CONTENT_TYPES[os.path.splitext(name)[1]])
+        for name, body in raw.items():
+            if name.endswith('.html'):
+                for asset_name in self.assets:
+                    body = body.replace(f'/static/{asset_name}"'.encode(), f'{self.url(asset_name)}"'.encode())
+                self.assets[name] = Asset(body, CONTENT_TYPES['.html'])
+
+    def render(self, name, replacements):
+        # Per-request variant of an asset (not cached): its identity body with literal substitutions
+        body = self.assets[name].representations['identity'][0]
+        for old, new in replacements.items():
+            body = body.replace(old, new)
+        return body
+
+    def url(self, name):
+        return f'/static/{name}?v={self.assets[name].version}'
+
+    def response(self, name, accept_encoding='', if_none_match='', version=None):
+        # (status, body, headers) for a GET of the named asset, or None if there is no such file
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ('br', 'gzip', 'identity'):
+            if coding in asset.representations and (coding == 'identity' or coding in accepted):
+                break
+        body, etag = asset.representations[coding]
+        headers = {
+            'Content-Type': asset.content_type,
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE if version == asset.version else REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+        if coding != 'identity':
+            headers['Content-Encoding'] = coding
+        tags = {tag.strip().removeprefix('W/') for tag in (if_none_match or '').split(',')}
+        if '*' in tags or etag in tags:
+            return 304, b'', headers
+        return 200, body, headers
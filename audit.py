@@ -0,0 +1,210 @@
+import argparse
+import atexit
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Append-only prediction audit log.
+# Request handlers only push one entry per request into a bounded in-memory buffer;
+# a background thread turns entries into one JSON line per scored record and appends
+# them in large batches to gzip files (each batch is its own gzip member, so a file is
+# readable up to the last completed batch even after a crash). Files rotate by size.
+#
+# When the buffer is full, overflow decides what happens:
+#   block        the request waits for the writer (nothing is lost, latency grows)
+#   drop_newest  the new entry is discarded and counted
+#   drop_oldest  the oldest buffered entry is discarded and counted
+#
+#   python audit.py read audit_logs --output logged.csv
+#
+# loads every file (optionally since a timestamp) into one table for retraining.
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+
+class AuditLog:
+    def __init__(self, directory, capacity=10_000, batch_size=1000, flush_interval=1.0,
+                 max_file_bytes=64 * 2 ** 20, overflow='block'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow must be one of {", ".join(OVERFLOW_POLICIES)}')
+        self.directory = directory
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.overflow = overflow
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._stats = {'logged': 0, 'written': 0, 'dropped': 0, 'files': 0, 'write_errors': 0}
+        self._closed = False
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        # Also called in forked children: the parent's thread and buffer do not carry over
+        self._buffer = deque()
+        self._pid = os.getpid()
+        self._file = None
+        self._file_bytes = 0
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def log(self, model_version, source, columns, records, results):
+        # One entry per request: the raw records (only columns are kept) and their (label, probability)
+        # results; serialization happens on the writer thread
+        entry = (time.time(), model_version, source, columns, records, results)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            if len(self._buffer) >= self.capacity:
+                if self.overflow == 'drop_newest':
+                    self._stats['dropped'] += len(records)
+                    return False
+                if self.overflow == 'drop_oldest':
+                    self._stats['dropped'] += len(self._buffer.popleft()[4])
+                else:
+                    while len(self._buffer) >= self.capacity and not self._closed:
+                        self._not_full.wait()
+            self._buffer.append(entry)
+            self._stats['logged'] += len(records)
+            if len(self._buffer) >= self.batch_size:
+                self._not_empty.notify()
+        return True
+
+    def _take_batch(self):
+        with self._lock:
+            if not self._buffer and not self._closed:
+                self._not_empty.wait(self.flush_interval)
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            self._not_full.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            elif self._closed:
+                return
+
+    def _write(self, batch):
+        lines = []
+        for timestamp, version, source, columns, records, results in batch:
+            for record, (label, probability) in zip(records, results):
+                line = {'ts': timestamp, 'model_version': version, 'source': source}
+                for col in columns:
+                    line[col] = record[col]
+                line['prediction'] = label
+                line['probability'] = probability
+                lines.append(json.dumps(line, separators=(',', ':'), default=str))
+        data = gzip.compress(('\n'.join(lines) + '\n').encode(), compresslevel=6)
+        try:
+            if self._file is None or self._file_bytes >= self.max_file_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._file_bytes += len(data)
+            written = len(lines)
+        except OSError:
+            written = 0
+        with self._lock:
+            self._stats['written'] += written
+            if not written:
+                self._stats['write_errors'] += 1
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        # Sortable by time; the pid keeps pre-forked workers out of each other's files
+        name = f'audit-{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10 ** 9:09d}-{os.getpid()}.jsonl.gz'
+        self._file = open(os.path.join(self.directory, name), 'ab')
+        self._file_bytes = 0
+        self._stats['files'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'queued': sum(len(entry[4]) for entry in self._buffer)}
+
+    def close(self, timeout=10.0):
+        # Flush everything still buffered, then stop the writer
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._pid == os.getpid():
+            self._thread.join(timeout)
+            if self._file is not None:
+                self._file.close()
+
+
+def log_files(directory):
+    return sorted(glob.glob(os.path.join(directory, 'audit-*.jsonl.gz')))
+
+
+def read_audit_log(directory, since=None):
+    # All logged predictions as one DataFrame, oldest file first (optionally only ts >= since)
+    import pandas as pd
+
+    frames = []
+    for path in log_files(directory):
+        with gzip.open(path, 'rt') as f:
+            try:
+                frame = pd.read_json(f, lines=True, dtype=False)
+            except (EOFError, gzip.BadGzipFile, ValueError):
+                # A writer killed mid-batch leaves a truncated last member; keep what is complete
+                frame = pd.DataFrame.from_records(_complete_lines(path))
+        if since is not None and len(frame):
+            frame = frame[frame['ts'] >= since]
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    table = pd.concat(frames, ignore_index=True)
+    # Form posts log numbers as the submitted strings; make those columns numeric again
+    for col in table.columns:
+        # pandas 3 reads strings as the str dtype, older versions as object
+        if pd.api.types.is_object_dtype(table[col]) or pd.api.types.is_string_dtype(table[col]):
+            numeric = pd.to_numeric(table[col], errors='coerce')
+            if numeric.notna().sum() == table[col].notna().sum():
+                table[col] = numeric
+    return table
+
+
+def _complete_lines(path):
+    records = []
+    try:
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                records.append(json.loads(line))
+    except (EOFError, gzip.BadGzipFile, ValueError):
+        pass
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Read prediction audit logs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    read_parser = commands.add_parser('read', help='Load logs into one table')
+    read_parser.add_argument('directory')
+    read_parser.add_argument('--since', type=float, help='Only entries at or after this Unix timestamp')
+    read_parser.add_argument('--output', help='Write the table as CSV')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = read_audit_log(args.directory, args.since)
+    elapsed = time.perf_counter() - start
+    print(f'{len(table):,} predictions from {len(log_files(args.directory))} file(s) in {elapsed:.2f}s')
+    if len(table):
+        print(table['prediction'].value_counts().to_string())
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f'Written to {args.output}')
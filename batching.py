@@ -0,0 +1,102 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Micro-batching dispatcher.
+# Concurrent callers submit single items; a background thread coalesces them and
+# flushes one batch when max_batch_size items are queued or max_wait seconds have
+# passed since the first one arrived. Each caller gets back its own result.
+# The thread starts on the first submit in each process, so an instance created before
+# a fork (gunicorn --preload) gets a fresh queue and thread in every worker.
+
+
+class MicroBatcher:
+    def __init__(self, predict_batch, max_batch_size=64, max_wait=0.002, timeout=5.0):
+        # predict_batch takes a list of items and returns a list of results in the same order
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # Longest predict() waits for its result before raising concurrent.futures.TimeoutError
+        self.timeout = timeout
+        self.batches = 0
+        self.items = 0
+        self._closed = False
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name='micro-batcher',
+                                                daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, item):
+        if self._closed:
+            raise RuntimeError('MicroBatcher is closed')
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item, timeout=None):
+        return self.submit(item).result(self.timeout if timeout is None else timeout)
+
+    def close(self):
+        self._closed = True
+        if self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _collect(self, items):
+        # Block for the first item, then gather more until the batch is full or the wait is over
+        first = items.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = items.get(timeout=remaining) if remaining > 0 else items.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish the current batch before shutting down
+                items.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self, items):
+        while True:
+            batch = self._collect(items)
+            if batch is None:
+                return
+            try:
+                results = self.predict_batch([item for item, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait': self.max_wait,
+        }
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+# Latency benchmark: Flask (threaded dev server) vs the ASGI entry point under uvicorn.
+# Both servers are started locally, then hit with the same JSON prediction requests at a
+# fixed concurrency; p50/p99 latency, throughput and error counts are reported per server.
+#
+#   python bench_serving.py --requests 5000 --concurrency 64
+
+SERVERS = {
+    'flask': [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', '{port}'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def sample_payloads(csv_path, n, seed=0):
+    # Single-record JSON bodies drawn from the dataset (rows with missing values skipped)
+    df = pd.read_csv(csv_path).drop(columns=['Student ID', 'Passed']).dropna()
+    rows = df.sample(n=n, replace=len(df) < n, random_state=seed).to_dict('records')
+    return [json.dumps([row]).encode() for row in rows]
+
+
+async def post(host, port, path, body):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f'POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    await reader.read()
+    writer.close()
+    return status
+
+
+async def run_load(host, port, payloads, concurrency, path='/api/predict'):
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < len(payloads):
+            body = payloads[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                status = await post(host, port, path, body)
+            except OSError:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/ready', timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not become ready')
+
+
+def bench_server(name, port, payloads, concurrency, warmup):
+    command = [part.format(port=port) for part in SERVERS[name]]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              env=dict(os.environ, PYTHONWARNINGS='ignore'))
+    try:
+        wait_ready(port)
+        asyncio.run(run_load('127.0.0.1', port, payloads[:warmup], concurrency))
+        return asyncio.run(run_load('127.0.0.1', port, payloads, concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare Flask and ASGI serving latency at high concurrency')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--warmup', type=int, default=200, help='Requests sent before measuring')
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['flask', 'asgi'])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--csv', default='student_performance_prediction.csv')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    payloads = sample_payloads(args.csv, args.requests)
+    results = {}
+    for offset, name in enumerate(args.servers):
+        results[name] = bench_server(name, args.port + offset, payloads, args.concurrency, args.warmup)
+        r = results[name]
+        print(f"{name:6} {r['throughput_rps']:8.0f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+              f"p99 {r['p99_ms']:7.1f} ms  errors {r['errors']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'results': results}, f, indent=2)
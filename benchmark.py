@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Reproducible benchmark suite for the serving and training paths.
+#
+#   python benchmark.py run --output before.json
+#   python benchmark.py run --output after.json
+#   python benchmark.py compare before.json after.json
+#
+# Every benchmark records per-call timings (median, p99, min); results are saved as
+# JSON together with machine metadata so runs from different commits can be compared.
+
+BUNDLE = 'student_performance_model_optimized.joblib'
+CSV = 'student_performance_prediction.csv'
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def timings(fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples)
+    return {
+        'median_s': float(np.median(samples)),
+        'p99_s': float(np.percentile(samples, 99)),
+        'min_s': float(samples.min()),
+        'repeat': repeat,
+    }
+
+
+def sample_records(n, seed=0):
+    import pandas as pd
+
+    df = pd.read_csv(CSV).drop(columns=['Student ID', 'Passed']).dropna()
+    return df.sample(n=n, replace=len(df) < n, random_state=seed).to_dict('records')
+
+
+def bench_index(repeat):
+    # Full single-row form POST through Flask, with the prediction cache off so every call scores
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    import app
+
+    client = app.app.test_client()
+    forms = [{k: str(v) for k, v in record.items()} for record in sample_records(256)]
+    position = iter(range(10 ** 9))
+    return timings(lambda: client.post('/', data=forms[next(position) % len(forms)]), repeat)
+
+
+def bench_models(budget):
+    from joblib import load
+
+    from serving import ServingModel
+
+    serving = ServingModel(load(BUNDLE), source=BUNDLE)
+    records = sample_records(max(BATCH_SIZES))
+    X_full = serving.encoder.encode(records)
+    model = serving.bundle['model']
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    results = {}
+    for size in BATCH_SIZES:
+        # Roughly the same number of rows per size, but never fewer than 3 calls
+        n = max(3, budget // size)
+        batch = records[:size]
+        X = X_full[:size]
+        results[f'preprocess_{size}'] = timings(lambda: serving.encoder.encode(batch), n)
+        results[f'predict_compiled_{size}'] = timings(lambda: serving.predictor.predict_proba(X), n)
+        results[f'predict_sklearn_{size}'] = timings(lambda: model.predict_proba(X), n)
+    return results
+
+
+def bench_model_load(repeat):
+    # Cold load in a fresh interpreter, including the scikit-learn import the bundle triggers
+    code = ('import time, warnings; warnings.simplefilter("ignore"); t = time.perf_counter(); '
+            'from serving import ServingModel; ServingModel.load(%r).warmup(); '
+            'print(time.perf_counter() - t)' % BUNDLE)
+    samples = [float(subprocess.check_output([sys.executable, '-c', code], text=True)) for _ in range(repeat)]
+    return {'median_s': float(np.median(samples)), 'p99_s': float(np.percentile(samples, 99)),
+            'min_s': float(min(samples)), 'repeat': repeat}
+
+
+def bench_training(repeat):
+    # Full train_model.py run on the bundled CSV, in a scratch directory so nothing is overwritten.
+    # --no-cache: every run parses and preprocesses the CSV instead of timing the cache hit
+    script = os.path.abspath('train_model.py')
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(CSV, tmp)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-W', 'ignore', script, '--no-cache'], cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+    return {'median_s': float(np.median(samples)), 'p99_s': float(np.percentile(samples, 99)),
+            'min_s': float(min(samples)), 'repeat': repeat}
+
+
+def machine_metadata():
+    versions = {}
+    for name in ('numpy', 'pandas', 'sklearn', 'flask', 'joblib'):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'versions': versions,
+    }
+
+
+def run(args):
+    import warnings
+
+    warnings.simplefilter('ignore')
+    repeat = 50 if args.quick else 500
+    results = {}
+    print('index() single-row POST ...', flush=True)
+    results['index_post'] = bench_index(repeat)
+    print('preprocessing and batch prediction ...', flush=True)
+    results.update(bench_models(repeat * 10))
+    print('model load ...', flush=True)
+    results['model_load'] = bench_model_load(2 if args.quick else 5)
+    if not args.skip_train:
+        print('train_model.py ...', flush=True)
+        results['train_model'] = bench_training(1 if args.quick else 3)
+
+    report = {'metadata': machine_metadata(), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    for name, r in results.items():
+        print(f"{name:28} median {r['median_s'] * 1000:10.3f} ms   p99 {r['p99_s'] * 1000:10.3f} ms")
+    print(f'Saved to {args.output}')
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    for label, report in (('baseline', baseline), ('candidate', candidate)):
+        meta = report['metadata']
+        print(f"{label:9}: {meta['git_commit'] or '?'} on {meta['platform']} ({meta['cpu_count']} CPUs)")
+    regressions = []
+    print(f"{'benchmark':28} {'baseline ms':>12} {'candidate ms':>13} {'change':>8}")
+    for name in sorted(set(baseline['results']) | set(candidate['results'])):
+        old = baseline['results'].get(name)
+        new = candidate['results'].get(name)
+        if old is None or new is None:
+            present = 'candidate' if old is None else 'baseline'
+            print(f'{name:28} only in {present}')
+            continue
+        change = new[args.stat] / old[args.stat] - 1
+        flag = ''
+        if change > args.threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:28} {old[args.stat] * 1000:12.3f} {new[args.stat] * 1000:13.3f} {change:+8.1%}{flag}")
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) slower by more than {args.threshold:.0%}')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark serving and training paths')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='Run the suite and save results as JSON')
+    run_parser.add_argument('--output', default='benchmark_results.json')
+    run_parser.add_argument('--quick', action='store_true', help='Fewer repetitions, single training run')
+    run_parser.add_argument('--skip-train', action='store_true', help='Leave out the train_model.py run')
+    compare_parser = commands.add_parser('compare', help='Compare two saved runs')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='Relative slowdown that counts as a regression')
+    compare_parser.add_argument('--stat', choices=['median_s', 'p99_s', 'min_s'], default='median_s',
+                                help='Statistic to compare (min_s is the least noisy for tiny timings)')
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        compare(args)
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+
+# In-process memoization of predictions.
+# Keys are normalized feature tuples (the encoded row), so '12.5', '12.50' and 12.5
+# share an entry. Entries expire after a TTL, the least recently used entry is
+# evicted once the cache is full, and everything is dropped when the model changes.
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, ttl=300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._model = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(row):
+        return tuple(row.tolist())
+
+    def _check_model(self, model):
+        # Results are only valid for the model that produced them
+        if model is not self._model:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model = model
+
+    def get(self, key, model):
+        with self._lock:
+            self._check_model(model)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, model):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_model(model)
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+from joblib import load
+from sklearn.model_selection import train_test_split
+
+from forest import CompiledForest, compile_forest, dump_compiled, predictor_from_bundle
+from serving import ServingModel
+from train_model import category_lists, load_data, load_preprocessed, preprocess
+
+# Shrinks a forest bundle for serving.
+#
+#   python compact_model.py --max-trees 30 --max-depth 6 --tolerance 0.002
+#
+# Works on the compiled node arrays: trees are cut at --max-depth (the cut node keeps
+# its class distribution as a leaf), then redundant trees are dropped greedily, each
+# time removing the tree whose absence changes the fewest predictions on the CSV, for
+# as long as agreement with the depth-cut forest stays within --tolerance (and always down
+# to --max-trees). The result is written as a compiled bundle: float32 thresholds
+# rounded down (so float32 inputs take exactly the same branches), float32 leaf values,
+# int8 features, int16 node indices when they fit, and no scikit-learn state at all.
+# Accuracy, file size, resident memory and p99 latency are reported before and after.
+
+OUTPUT_PATH = 'student_performance_model_compact.joblib'
+
+
+def _float32_floor(values):
+    # Largest float32 <= each value; for float32 x, x <= t exactly when x <= floor32(t)
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def node_depths(forest):
+    # Depth of every node, one vectorized step per tree level (leaves point at themselves)
+    depth = np.full(forest.n_nodes, -1, dtype=np.int64)
+    frontier = np.asarray(forest.roots, dtype=np.int64)
+    level = 0
+    while len(frontier):
+        depth[frontier] = level
+        children = np.concatenate([forest.children_left[frontier], forest.children_right[frontier]])
+        frontier = np.unique(children[depth[children] == -1])
+        level += 1
+    return depth
+
+
+def subforest(forest, trees, max_depth=None):
+    # The given trees, each cut at max_depth, renumbered into compact arrays
+    trees = np.sort(np.asarray(trees))
+    depth = node_depths(forest)
+    tree_of_node = np.searchsorted(forest.roots, np.arange(forest.n_nodes), side='right') - 1
+    keep = np.isin(tree_of_node, trees) & (depth >= 0)
+    is_leaf = forest.children_left == np.arange(forest.n_nodes)
+    if max_depth is not None:
+        keep &= depth <= max_depth
+        is_leaf = is_leaf | (depth == max_depth)
+    new_index = np.cumsum(keep) - 1
+    kept = np.flatnonzero(keep)
+    leaf = is_leaf[kept]
+
+    n_nodes = len(kept)
+    index_dtype = np.int16 if n_nodes <= np.iinfo(np.int16).max else np.int32
+    feature_dtype = np.int8 if forest.feature.max() <= np.iinfo(np.int8).max else np.int16
+    own = np.arange(n_nodes)
+    left = np.where(leaf, own, new_index[forest.children_left[kept]])
+    right = np.where(leaf, own, new_index[forest.children_right[kept]])
+    return CompiledForest(
+        feature=np.where(leaf, 0, forest.feature[kept]).astype(feature_dtype),
+        threshold=_float32_floor(np.where(leaf, 0.0, forest.threshold[kept]).astype(np.float64)),
+        children_left=left.astype(index_dtype),
+        children_right=right.astype(index_dtype),
+        leaf_values=np.ascontiguousarray(forest.leaf_values[kept], dtype=np.float32),
+        roots=new_index[forest.roots[trees]].astype(index_dtype),
+        max_depth=int(depth[kept].max()),
+        classes=forest.classes_,
+    )
+
+
+def select_trees(forest, X, max_trees=None, tolerance=0.0, min_trees=1):
+    # Greedy backward elimination: repeatedly drop the tree whose absence changes the fewest
+    # predictions of the full forest, while agreement stays within tolerance of 100%
+    # (tolerance 0 drops only trees that are redundant on X), and always down to max_trees
+    values = forest.leaf_values[forest.apply(X)].astype(np.float64)  # (rows, trees, classes)
+    total = values.sum(axis=1)
+    reference = total.argmax(axis=1)
+    remaining = list(range(forest.n_trees))
+    while len(remaining) > min_trees:
+        scores = [float(((total - values[:, t]).argmax(axis=1) == reference).mean()) for t in remaining]
+        best = int(np.argmax(scores))
+        forced = max_trees is not None and len(remaining) > max_trees
+        if not forced and scores[best] < 1.0 - tolerance:
+            break
+        total -= values[:, remaining[best]]
+        del remaining[best]
+    return remaining
+
+
+def evaluation_data(bundle, csv_path, seed):
+    # Encoded rows with labels, cleaned like train_model.py and encoded with the bundle's categories
+    X, y, impute_values, label_encoders = load_preprocessed(csv_path)
+    categories = bundle.get('categories')
+    if categories is None:
+        categories = category_lists(bundle['label_encoders'])
+    if categories != category_lists(label_encoders):
+        # Bundle trained on other labels than this CSV has: encode with its categories
+        X, y, _, _ = preprocess(load_data(csv_path), impute_values, categories)
+    X = X[list(bundle['columns'])].to_numpy(dtype=np.float32)
+    y = y.to_numpy()
+    # Accuracy is reported on the training holdout
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+    return X, X_test, y_test
+
+
+def single_row_p99(serving, X, repeat=2000):
+    samples = []
+    for i in range(repeat):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        serving.score(row)
+        samples.append(time.perf_counter() - start)
+    return float(np.percentile(samples, 99)) * 1000
+
+
+def resident_memory(path):
+    # RSS of a fresh interpreter after loading and warming up the bundle, as the app does
+    code = ('import os, resource, sys, warnings; warnings.simplefilter("ignore"); '
+            'from serving import ServingModel; ServingModel.load(%r).warmup(); '
+            'status = "/proc/self/status"; '
+            'rss = [int(l.split()[1]) * 1024 for l in open(status) if l.startswith("VmRSS")][0] '
+            'if os.path.exists(status) else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss; '
+            'print(rss)' % os.path.abspath(path))
+    try:
+        output = subprocess.check_output([sys.executable, '-c', code], text=True,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        # Neither /proc nor resource (Windows)
+        return None
+    return int(output) / 2 ** 20
+
+
+def measure(path, X_all, X_eval, y_eval, reference):
+    serving = ServingModel.load(path)
+    predictions = serving.predictor.predict(X_all)
+    return {
+        'accuracy': float((serving.predictor.predict(X_eval) == y_eval).mean()),
+        'agreement': float((predictions == reference).mean()),
+        'trees': int(serving.predictor.n_trees) if hasattr(serving.predictor, 'n_trees') else None,
+        'nodes': int(serving.predictor.n_nodes) if hasattr(serving.predictor, 'n_nodes') else None,
+        'file_kb': os.path.getsize(path) / 1024,
+        'rss_mb': resident_memory(path),
+        'p99_ms': single_row_p99(serving, X_eval),
+    }
+
+
+def format_report(before, after):
+    lines = [f"{'':12} {'before':>12} {'after':>12}"]
+    for key, fmt in (('accuracy', '{:.4f}'), ('agreement', '{:.4f}'), ('trees', '{}'), ('nodes', '{}'),
+                     ('file_kb', '{:.1f}'), ('rss_mb', '{:.1f}'), ('p99_ms', '{:.3f}')):
+        cells = ['n/a' if r[key] is None else fmt.format(r[key]) for r in (before, after)]
+        lines.append(f'{key:12} {cells[0]:>12} {cells[1]:>12}')
+    return '\n'.join(lines)
+
+
+def main(args):
+    bundle = load(args.bundle)
+    forest = predictor_from_bundle(bundle)
+    if not isinstance(forest, CompiledForest):
+        forest = compile_forest(bundle['model'])
+    X_all, X_eval, y_eval = evaluation_data(bundle, args.csv, args.seed)
+
+    cut = subforest(forest, range(forest.n_trees), args.max_depth)
+    trees = select_trees(cut, X_all, args.max_trees, args.tolerance)
+    compact = subforest(cut, trees)
+    dump_compiled(bundle, args.output, forest=compact)
+    print(f'Kept {compact.n_trees}/{forest.n_trees} trees, {compact.n_nodes}/{forest.n_nodes} nodes '
+          f'(depth {compact.max_depth}) -> {args.output}')
+
+    reference = forest.predict(X_all)
+    report = {
+        'before': measure(args.bundle, X_all, X_eval, y_eval, reference),
+        'after': measure(args.output, X_all, X_eval, y_eval, reference),
+    }
+    print(format_report(report['before'], report['after']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prune and compact a forest bundle for serving')
+    parser.add_argument('--bundle', default='student_performance_model_optimized.joblib')
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--csv', default='student_performance_prediction.csv')
+    parser.add_argument('--max-trees', type=int, help='Drop trees until at most this many are left')
+    parser.add_argument('--max-depth', type=int, help='Cut every tree at this depth')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Share of changed predictions allowed when dropping trees beyond --max-trees')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the training split (accuracy is on its holdout)')
+    parser.add_argument('--json', help='Also write the report to this file')
+    main(parser.parse_args())
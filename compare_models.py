@@ -0,0 +1,175 @@
+import argparse
+import json
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, dump
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from drift import build_baseline
+from forest import predictor_from_bundle
+from train_model import CSV_PATH, categorical_cols, category_lists, load_preprocessed, make_bundle
+from tune_model import bundle_size, cached_arrays, single_row_latency
+
+# Compares model families on the accuracy / latency / size trade-off.
+#
+#   python compare_models.py
+#   python compare_models.py --export hist_gradient_boosting --output student_performance_model_hgb.joblib
+#
+# Every family is trained (in parallel, one process each) on the same split train_model.py
+# uses, with every worker memory-mapping the preprocessing cache entry. Latency is then measured
+# one family at a time through the predictor app.py would serve it with: p99 of single-row
+# predict_proba calls and the median time of a --batch-size batch. The report marks the
+# Pareto front over accuracy, single-row p99, batch time and bundle size: the families no
+# other family matches or beats on all four. Fit time is wall time inside the parallel pool,
+# so it includes contention with the other families (--n-jobs 1 fits them one at a time).
+# It is informational only and not a Pareto objective. An exported bundle has the usual format, so
+# MODEL_PATH=<output> python app.py serves it (forests compiled, anything else through sklearn).
+
+
+def _categorical_indices(columns):
+    return [i for i, col in enumerate(columns) if col in categorical_cols]
+
+
+def _numerical_indices(columns):
+    return [i for i, col in enumerate(columns) if col not in categorical_cols]
+
+
+FAMILIES = {
+    'random_forest': lambda columns, seed: RandomForestClassifier(
+        n_estimators=50, max_depth=8, random_state=seed, n_jobs=1),
+    'hist_gradient_boosting': lambda columns, seed: HistGradientBoostingClassifier(
+        max_iter=100, categorical_features=_categorical_indices(columns), random_state=seed),
+    'logistic_regression': lambda columns, seed: make_pipeline(
+        ColumnTransformer([('categorical', OneHotEncoder(handle_unknown='ignore'), _categorical_indices(columns)),
+                           ('numerical', StandardScaler(), _numerical_indices(columns))]),
+        LogisticRegression(max_iter=1000)),
+    'decision_tree': lambda columns, seed: DecisionTreeClassifier(max_depth=6, min_samples_leaf=25, random_state=seed),
+}
+MODEL_TYPES = {
+    'random_forest': 'RandomForest',
+    'hist_gradient_boosting': 'HistGradientBoosting',
+    'logistic_regression': 'LogisticRegression',
+    'decision_tree': 'DecisionTree',
+}
+# Minimized objectives of the Pareto front (accuracy is maximized)
+COSTS = ('latency_ms', 'batch_ms', 'size_kb')
+
+
+def fit_family(name, cache, train_idx, test_idx, columns, seed):
+    X = np.load(cache['X'], mmap_mode='r')
+    y = np.load(cache['y'], mmap_mode='r')
+    model = FAMILIES[name](columns, seed)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    return name, model, fit_seconds, float(model.score(np.asarray(X[test_idx]), y[test_idx]))
+
+
+def batch_latency(bundle, rows, batch_size, repeat=20):
+    # Median time of one predict_proba call on batch_size rows
+    predictor = predictor_from_bundle(bundle)
+    batch = np.ascontiguousarray(np.resize(rows, (batch_size, rows.shape[1])))
+    predictor.predict_proba(batch)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predictor.predict_proba(batch)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+
+def dominates(a, b):
+    # a is at least as good on every objective and strictly better on one
+    at_least = a['accuracy'] >= b['accuracy'] and all(a[key] <= b[key] for key in COSTS)
+    better = a['accuracy'] > b['accuracy'] or any(a[key] < b[key] for key in COSTS)
+    return at_least and better
+
+
+def pareto_front(results):
+    for result in results:
+        result['pareto'] = not any(dominates(other, result) for other in results if other is not result)
+    return results
+
+
+def format_report(results):
+    lines = [f"{'family':24} {'accuracy':>9} {'p99 ms':>8} {'batch ms':>9} {'size KB':>9} {'fit s':>7}  pareto"]
+    for r in sorted(results, key=lambda r: r['accuracy'], reverse=True):
+        lines.append(f"{r['family']:24} {r['accuracy']:9.4f} {r['latency_ms']:8.3f} {r['batch_ms']:9.3f} "
+                     f"{r['size_kb']:9.1f} {r['fit_seconds']:7.2f}  {'*' if r['pareto'] else ''}")
+    return '\n'.join(lines)
+
+
+def compare(families, csv_path=CSV_PATH, seed=42, n_jobs=-1, batch_size=1000):
+    # (results, bundles): one result row and one servable bundle per family
+    X, _, impute_values, label_encoders = load_preprocessed(csv_path)
+    columns = list(X.columns)
+    drift_baseline = build_baseline(X.to_numpy(dtype=np.float32), columns, categorical_cols,
+                                    category_lists(label_encoders))
+    meta = {'columns': columns, 'impute_values': impute_values, 'label_encoders': label_encoders,
+            'drift_baseline': drift_baseline}
+    # Same test split as train_model.py
+    train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=seed)
+    train_idx, test_idx = np.sort(train_idx), np.sort(test_idx)
+
+    cache = cached_arrays(csv_path)
+    fitted = Parallel(n_jobs=n_jobs)(delayed(fit_family)(name, cache, train_idx, test_idx, columns, seed)
+                                     for name in families)
+    X_test = np.ascontiguousarray(X.to_numpy(dtype=np.float32)[test_idx])
+
+    # Timed one family at a time, so the measurements do not compete for cores
+    results, bundles = [], {}
+    for name, model, fit_seconds, accuracy in fitted:
+        bundle = {**make_bundle(model, **meta), 'model_type': MODEL_TYPES[name]}
+        bundles[name] = bundle
+        results.append({
+            'family': name,
+            'accuracy': accuracy,
+            'latency_ms': single_row_latency(bundle, X_test, repeat=1000),
+            'batch_ms': batch_latency(bundle, X_test, batch_size),
+            'size_kb': bundle_size(bundle) / 1024,
+            'fit_seconds': fit_seconds,
+        })
+    return pareto_front(results), bundles
+
+
+def main(args):
+    families = args.families or list(FAMILIES)
+    unknown = [name for name in families + ([args.export] if args.export else []) if name not in FAMILIES]
+    if unknown:
+        raise SystemExit(f'Unknown families: {", ".join(unknown)} (choose from {", ".join(FAMILIES)})')
+    if args.export and args.export not in families:
+        families.append(args.export)
+
+    results, bundles = compare(families, args.csv, args.seed, args.n_jobs, args.batch_size)
+    print(format_report(results))
+    print(f'(p99 of single-row predict_proba, median of a {args.batch_size}-row batch, '
+          f'compressed bundle size; * = on the Pareto front)')
+    if args.n_jobs != 1 and len(families) > 1:
+        print('(fit s is wall time while the families train in parallel; --n-jobs 1 gives isolated fit times)')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.export:
+        output = args.output or f'student_performance_model_{args.export}.joblib'
+        dump(bundles[args.export], output, compress=3)
+        print(f'Exported {args.export} to {output} (serve with MODEL_PATH={output} python app.py)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare model families on accuracy, latency and size')
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--families', nargs='+', help=f'Subset of: {", ".join(FAMILIES)}')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Families trained in parallel (-1 = all cores)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch in the batch latency test')
+    parser.add_argument('--json', help='Also write the results to this file')
+    parser.add_argument('--export', help='Write this family as a servable bundle')
+    parser.add_argument('--output', help='Path of the exported bundle')
+    main(parser.parse_args())
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Constant-memory input drift monitoring.
+# A baseline (computed by train_model.py from the training matrix) holds, per numeric
+# feature, decile bin edges with the training count in each bin and, per categorical
+# feature, the training count of each label. DriftMonitor keeps the same fixed-size
+# counters for the rows being served and scores every feature with the population
+# stability index (PSI) against the baseline. The request path only appends the encoded
+# rows to a bounded queue; a background thread (one per process, started on first use and
+# stopped when idle) folds them into the counters flush_rows at a time, and a scrape folds
+# whatever is still queued. If the folder falls behind by max_pending_rows, new rows are
+# skipped and counted in dropped_rows rather than slowing requests down.
+#
+#   python drift.py --csv student_performance_prediction.csv --output drift_baseline.json
+#
+# writes a baseline for bundles trained before train_model.py started embedding one
+# (serve it with DRIFT_BASELINE=drift_baseline.json).
+
+# Usual PSI reading: below 0.1 stable, up to 0.25 moderate shift, above that a major one
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+_EPSILON = 1e-4
+
+
+def psi(expected, actual):
+    expected = np.maximum(expected / expected.sum(), _EPSILON)
+    actual = np.maximum(actual / actual.sum(), _EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def baseline_skeleton(X, columns, categorical_cols, categories, bins=10):
+    # Bin edges at the quantiles of X (a sample is enough), all counters still empty.
+    # Categoricals get one extra bucket for labels the model was not trained on.
+    X = np.asarray(X, dtype=np.float32)
+    features = {}
+    for j, col in enumerate(columns):
+        if col in categorical_cols:
+            features[col] = {'labels': list(categories[col]), 'counts': [0] * (len(categories[col]) + 1)}
+        else:
+            edges = np.unique(np.quantile(X[:, j], np.linspace(0, 1, bins + 1)[1:-1]))
+            features[col] = {'edges': edges.tolist(), 'counts': [0] * (len(edges) + 1)}
+    return {'rows': 0, 'features': features}
+
+
+def build_baseline(X, columns, categorical_cols, categories, bins=10):
+    monitor = DriftMonitor(baseline_skeleton(X, columns, categorical_cols, categories, bins), columns, categories)
+    monitor.add(np.asarray(X, dtype=np.float32))
+    return monitor.to_baseline()
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class DriftMonitor:
+    def __init__(self, baseline, columns, categories, window=None, flush_rows=256, max_pending_rows=100_000,
+                 idle_seconds=60.0):
+        self.baseline = baseline
+        # With a window, counts are halved whenever they pass it, so recent traffic dominates
+        self.window = window
+        self.flush_rows = flush_rows
+        self.max_pending_rows = max_pending_rows
+        self.idle_seconds = idle_seconds
+        self._features = []
+        self._counts = {}
+        for j, col in enumerate(columns):
+            spec = baseline['features'].get(col)
+            if spec is None:
+                continue
+            if 'edges' in spec:
+                self._features.append((col, j, np.asarray(spec['edges'], dtype=np.float64), None))
+            else:
+                # Serving code -> baseline bucket (the last bucket collects labels unknown to the baseline)
+                labels = spec['labels']
+                lookup = np.array([labels.index(label) if label in labels else len(labels)
+                                   for label in categories[col]], dtype=np.intp)
+                self._features.append((col, j, None, lookup))
+            self._counts[col] = np.zeros(len(spec['counts']))
+        self.rows = 0.0
+        self.dropped_rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        # _lock guards the queue (taken by requests), _counts_lock the counters (taken by the folder)
+        self._lock = threading.Lock()
+        self._queued = threading.Condition(self._lock)
+        self._counts_lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    def update(self, X):
+        # Hot path: queue the encoded rows (callers must not modify X afterwards)
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._start()
+            if self._pending_rows + len(X) > self.max_pending_rows:
+                self.dropped_rows += len(X)
+                return
+            self._pending.append(X)
+            self._pending_rows += len(X)
+            if self._pending_rows >= self.flush_rows:
+                self._queued.notify()
+
+    def add(self, X):
+        # Fold rows right away, in the caller's thread (building baselines offline)
+        with self._counts_lock:
+            self._fold([X])
+
+    def _start(self):
+        # Called with _lock held; in a forked child the parent's queue and thread are gone
+        if self._pid != os.getpid():
+            self._pending = []
+            self._pending_rows = 0
+            self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='drift-folder', daemon=True)
+        self._thread.start()
+
+    def _take(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._pending_rows = 0
+        return pending
+
+    def _run(self):
+        idle_since = None
+        while True:
+            with self._lock:
+                if self._pending_rows < self.flush_rows:
+                    self._queued.wait(1.0)
+                if not self._pending:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since >= self.idle_seconds:
+                        # Exit when idle (a replaced model's monitor stops on its own); update() restarts it
+                        self._thread = None
+                        return
+                    continue
+            idle_since = None
+            pending = self._take()
+            with self._counts_lock:
+                self._fold(pending)
+
+    def _fold(self, pending):
+        if not pending:
+            return
+        X = pending[0] if len(pending) == 1 else np.concatenate(pending)
+        for col, j, edges, lookup in self._features:
+            if edges is not None:
+                bins = np.searchsorted(edges, X[:, j], side='right')
+            else:
+                bins = lookup[X[:, j].astype(np.intp)]
+            self._counts[col] += np.bincount(bins, minlength=len(self._counts[col]))
+        self.rows += len(X)
+        if self.window and self.rows > self.window:
+            for counts in self._counts.values():
+                counts *= 0.5
+            self.rows *= 0.5
+
+    def snapshot(self):
+        # Folds whatever is still queued, so a scrape always sees every accepted row
+        pending = self._take()
+        with self._counts_lock:
+            self._fold(pending)
+            return self.rows, {col: counts.copy() for col, counts in self._counts.items()}
+
+    def scores(self, min_rows=100):
+        # PSI per feature against the baseline, and an overall status from the worst feature
+        rows, counts = self.snapshot()
+        features = {}
+        if rows:
+            for col, current in counts.items():
+                features[col] = psi(np.asarray(self.baseline['features'][col]['counts'], dtype=np.float64), current)
+        worst = max(features.values(), default=0.0)
+        if rows < min_rows:
+            status = 'insufficient_data'
+        elif worst >= PSI_MAJOR:
+            status = 'major'
+        elif worst >= PSI_MODERATE:
+            status = 'moderate'
+        else:
+            status = 'stable'
+        return {'rows': int(rows), 'dropped_rows': self.dropped_rows, 'status': status, 'max_psi': worst,
+                'psi': features}
+
+    def to_baseline(self):
+        rows, counts = self.snapshot()
+        features = {}
+        for col, spec in self.baseline['features'].items():
+            features[col] = {**spec, 'counts': [int(c) for c in counts[col]]}
+        return {'rows': int(rows), 'features': features}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute a drift baseline from the training CSV')
+    parser.add_argument('--csv', default='student_performance_prediction.csv')
+    parser.add_argument('--output', default='drift_baseline.json')
+    parser.add_argument('--bins', type=int, default=10, help='Quantile bins per numeric feature')
+    args = parser.parse_args()
+
+    from train_model import categorical_cols, category_lists, load_preprocessed
+
+    X, _, _, label_encoders = load_preprocessed(args.csv)
+    baseline = build_baseline(X.to_numpy(dtype=np.float32), list(X.columns), categorical_cols,
+                              category_lists(label_encoders), args.bins)
+    with open(args.output, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Baseline over {baseline['rows']:,} rows written to {args.output}")
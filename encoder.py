@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+
+# Precompiled feature encoder for the serving hot path.
+# Built once from the model bundle, it turns raw form/JSON values straight into
+# the float32 matrix the forest evaluates, without going through pandas.
+
+
+def _to_float(value):
+    # Mirrors pd.to_numeric(errors='coerce') followed by fillna(0)
+    if isinstance(value, str):
+        # float() also accepts digit separators and non-ASCII digits, pandas does not
+        if '_' in value or not value.isascii():
+            return 0.0
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+class FeatureEncoder:
+    def __init__(self, columns, categorical_cols, categories):
+        self.columns = list(columns)
+        self.categorical_cols = list(categorical_cols)
+        # Label encoders sort their classes, so the code of a value is its index in classes_
+        self.categories = {col: list(categories[col]) for col in self.categorical_cols}
+        self._lookups = {col: {value: float(code) for code, value in enumerate(classes)}
+                         for col, classes in self.categories.items()}
+        self._plan = [(i, col, self._lookups.get(col)) for i, col in enumerate(self.columns)]
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        # Compiled bundles carry plain category lists; training bundles carry fitted LabelEncoders
+        categories = bundle.get('categories')
+        if categories is None:
+            label_encoders = bundle['label_encoders']
+            categories = {col: label_encoders[col].classes_.tolist() for col in bundle['categorical_cols']}
+        return cls(bundle['columns'], bundle['categorical_cols'], categories)
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    def encode(self, records, out=None):
+        # Fill a preallocated float32 matrix, one row per record, in bundle column order
+        if out is None:
+            out = np.empty((len(records), len(self.columns)), dtype=np.float32)
+        for row, record in enumerate(records):
+            self.encode_row(record, out[row])
+        return out
+
+    def encode_row(self, record, out=None):
+        if out is None:
+            out = np.empty(len(self.columns), dtype=np.float32)
+        for i, col, lookup in self._plan:
+            value = record[col]
+            if lookup is None:
+                out[i] = _to_float(value)
+            else:
+                try:
+                    out[i] = lookup[value]
+                except (KeyError, TypeError):
+                    # Same error LabelEncoder.transform raises for unknown labels
+                    raise ValueError(f'y contains previously unseen labels: {value!r}') from None
+        return out
+
+
+    def encode_columns(self, data, out=None):
+        # Column-wise variant for clean columnar input (a DataFrame chunk or a dict of arrays):
+        # numerics must already be imputed and categoricals limited to known labels
+        n_rows = len(data[self.columns[0]])
+        if out is None:
+            out = np.empty((n_rows, len(self.columns)), dtype=np.float32)
+        for i, col, lookup in self._plan:
+            values = data[col]
+            if lookup is None:
+                out[:, i] = np.asarray(values, dtype=np.float64)
+            else:
+                try:
+                    out[:, i] = [lookup[value] for value in values]
+                except KeyError as exc:
+                    raise ValueError(f'y contains previously unseen labels: {exc.args[0]!r}') from None
+        return out
+
+
+def _pandas_features(bundle, records):
+    # Reference implementation: the DataFrame path app.py used before the encoder
+    import pandas as pd
+
+    X = pd.DataFrame.from_records(records, columns=bundle['columns'])
+    for col in X.columns:
+        if col not in bundle['categorical_cols']:
+            X[col] = pd.to_numeric(X[col], errors='coerce')
+    for col in bundle['categorical_cols']:
+        X[col] = bundle['label_encoders'][col].transform(X[col])
+    return X.fillna(0).to_numpy(dtype=np.float32)
+
+
+def check_parity(bundle, records):
+    # Returns the indices of records where the encoder disagrees with the pandas path
+    encoder = FeatureEncoder.from_bundle(bundle)
+    mismatches = []
+    for i, record in enumerate(records):
+        expected = _pandas_features(bundle, [record])
+        actual = encoder.encode([record])
+        if not np.array_equal(expected, actual):
+            mismatches.append(i)
+    batch_equal = np.array_equal(_pandas_features(bundle, records), encoder.encode(records))
+    return mismatches, batch_equal
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    from joblib import load
+
+    bundle = load('student_performance_model_optimized.joblib')
+    df = pd.read_csv('student_performance_prediction.csv', dtype=str, keep_default_na=False)
+    for col in bundle['categorical_cols']:
+        df = df[df[col].isin(bundle['label_encoders'][col].classes_)]
+    records = df[bundle['columns']].to_dict('records')
+    # Awkward inputs a form or JSON client can send for the numeric fields
+    template = dict(records[0])
+    for value in ['', ' 5 ', '1e3', 'inf', 'nan', 'abc', '1_000', '５', None, 7, 7.25, True]:
+        records.append(dict(template, **{bundle['columns'][0]: value}))
+    mismatches, batch_equal = check_parity(bundle, records)
+    print(f'Checked {len(records)} records: {len(mismatches)} row mismatches, '
+          f'batch {"matches" if batch_equal else "differs"}')
+    if mismatches or not batch_equal:
+        raise SystemExit(1)
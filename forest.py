@@ -0,0 +1,294 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+from joblib import dump, load
+
+from lookup import LOOKUP_MODEL_TYPE, LookupTable
+from registry import current_umask
+
+# Flattened RandomForest evaluator.
+# compile_forest() packs every tree of a fitted forest into contiguous node arrays,
+# and CompiledForest walks all trees for a whole batch at once with NumPy. Nothing
+# here imports scikit-learn, so a compiled bundle can be served without it.
+
+COMPILED_MODEL_TYPE = 'CompiledRandomForest'
+
+_TREE_LEAF = -1
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, children_left, children_right, leaf_values, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        # Children interleaved as (right, left) so a comparison result indexes the next node directly
+        # (compact bundles may store int16 indices; the walk needs room for 2 * node + 1)
+        self._children = np.stack([children_right, children_left], axis=1).ravel().astype(
+            np.promote_types(children_left.dtype, np.int32))
+        self._roots = np.asarray(roots, dtype=np.intp)
+        # Per-node path contributions, built on demand by prepare_contributions()
+        self._contributions = None
+        self._contributions_features = None
+        self._bias = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def apply(self, X, block_size=1024):
+        # Leaf index reached in every tree, shape (n_samples, n_trees)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        leaves = np.empty((n_samples, self.n_trees), dtype=self.roots.dtype)
+        # Row blocks keep the (rows, trees) working set in cache
+        for start in range(0, n_samples, block_size):
+            block = X[start:start + block_size]
+            flat = block.ravel()
+            row_offsets = (np.arange(len(block), dtype=np.intp) * n_features)[:, np.newaxis]
+            node = np.repeat(self._roots[np.newaxis, :], len(block), axis=0)
+            # Leaves loop back to themselves, so max_depth steps settle every path
+            for _ in range(self.max_depth):
+                # float32 inputs against float64 thresholds, exactly like sklearn's tree walk
+                go_left = flat[row_offsets + self.feature[node]] <= self.threshold[node]
+                node = self._children[2 * node + go_left]
+            leaves[start:start + block_size] = node
+        return leaves
+
+    def _proba(self, leaves):
+        # A running sum adds trees in estimator order, matching sklearn's accumulation bit for bit
+        proba = self.leaf_values[leaves].cumsum(axis=1)[:, -1]
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba(self, X):
+        return self._proba(self.apply(X))
+
+    def prepare_contributions(self, n_features):
+        # Path decomposition: every split moves the class distribution from the parent's to the
+        # child's, and that change is credited to the split feature. Summing the changes from
+        # the root gives each node's contributions, so explaining a row only needs its leaves.
+        # Stored as float32, and for two classes only the second: class probabilities sum to one,
+        # so the first class's contributions are the negation (a quarter of the full table).
+        values = self.leaf_values.astype(np.float64)
+        stored = values[:, 1:] if values.shape[1] == 2 else values
+        contributions = np.zeros((self.n_nodes, n_features, stored.shape[1]), dtype=np.float32)
+        frontier = self._roots
+        while len(frontier):
+            internal = frontier[self.children_left[frontier] != frontier]
+            children = []
+            for child in (self.children_left[internal].astype(np.intp), self.children_right[internal].astype(np.intp)):
+                contributions[child] = contributions[internal]
+                contributions[child, self.feature[internal]] += stored[child] - stored[internal]
+                children.append(child)
+            frontier = np.concatenate(children)
+        self._contributions = contributions.reshape(self.n_nodes, -1)
+        self._contributions_features = n_features
+        self._bias = values[self._roots].mean(axis=0)
+
+    def explain(self, X, block_size=1024):
+        # (proba, bias, contributions) from a single walk, with contributions shaped
+        # (n_samples, n_features, n_classes) and proba == bias + contributions.sum(axis=1)
+        # up to rounding
+        X = np.asarray(X)
+        n_samples, n_features = X.shape
+        if self._contributions is None or self._contributions_features != n_features:
+            self.prepare_contributions(n_features)
+        leaves = self.apply(X)
+        contributions = np.empty((n_samples, self._contributions.shape[1]))
+        for start in range(0, n_samples, block_size):
+            block = leaves[start:start + block_size]
+            contributions[start:start + block_size] = self._contributions[block].sum(axis=1, dtype=np.float64)
+        contributions /= self.n_trees
+        contributions = contributions.reshape(n_samples, n_features, -1)
+        if len(self._bias) == 2:
+            contributions = np.concatenate([-contributions, contributions], axis=2)
+        return self._proba(leaves), self._bias, contributions
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def to_dict(self):
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children_left': self.children_left,
+            'children_right': self.children_right,
+            'leaf_values': self.leaf_values,
+            'roots': self.roots,
+            'max_depth': self.max_depth,
+            'classes': self.classes_,
+        }
+
+    @classmethod
+    def from_dict(cls, arrays):
+        return cls(arrays['feature'], arrays['threshold'], arrays['children_left'], arrays['children_right'],
+                   arrays['leaf_values'], arrays['roots'], arrays['max_depth'], arrays['classes'])
+
+
+def compile_forest(model):
+    # Works on any fitted single-output forest classifier exposing estimators_/tree_,
+    # and on a single decision tree (a forest of one)
+    estimators = [model] if hasattr(model, 'tree_') else getattr(model, 'estimators_', None)
+    if not estimators or not all(hasattr(est, 'tree_') for est in estimators):
+        raise TypeError(f'{type(model).__name__} is not a fitted tree ensemble')
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise TypeError('Only single-output forests can be compiled')
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        index = np.arange(offset, offset + n)
+        is_leaf = tree.children_left == _TREE_LEAF
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, index, tree.children_left + offset))
+        rights.append(np.where(is_leaf, index, tree.children_right + offset))
+        # Same per-leaf normalisation as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n
+
+    index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(features), dtype=index_dtype),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        children_left=np.ascontiguousarray(np.concatenate(lefts), dtype=index_dtype),
+        children_right=np.ascontiguousarray(np.concatenate(rights), dtype=index_dtype),
+        leaf_values=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=index_dtype),
+        max_depth=max_depth,
+        classes=np.asarray(model.classes_),
+    )
+
+
+def predictor_from_bundle(bundle, compiled=True):
+    # Object with predict/predict_proba/classes_ to serve a bundle with.
+    # The flat walk wins on small batches; sklearn's Cython walk wins on very large ones,
+    # so bulk tools pass compiled=False to keep the estimator when there is one.
+    if bundle.get('model_type') == COMPILED_MODEL_TYPE:
+        return CompiledForest.from_dict(bundle['forest'])
+    if bundle.get('model_type') == LOOKUP_MODEL_TYPE:
+        return LookupTable.from_dict(bundle['lookup'])
+    model = bundle['model']
+    if compiled:
+        try:
+            return compile_forest(model)
+        except TypeError:
+            pass
+    # Callers feed the estimator encoded matrices in bundle column order,
+    # so sklearn's per-call feature-name check is redundant
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    return model
+
+
+def dump_atomic(value, path):
+    # Uncompressed bundles are memory-mapped by the processes serving them; dumping in place
+    # would truncate pages under their feet (SIGBUS), so write a sibling file and rename it over
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-', suffix='.joblib')
+    os.close(fd)
+    try:
+        dump(value, tmp)
+        # mkstemp creates the file 0600; give it the permissions a plain open() would
+        os.chmod(tmp, 0o666 & ~current_umask())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def dump_compiled(bundle, path, forest=None):
+    # Serving bundle that needs neither scikit-learn nor pandas to load.
+    # Stored uncompressed so the node arrays can be memory-mapped.
+    if forest is None:
+        forest = compile_forest(bundle['model'])
+    categories = bundle.get('categories')
+    if categories is None:
+        label_encoders = bundle['label_encoders']
+        categories = {col: label_encoders[col].classes_.tolist() for col in bundle['categorical_cols']}
+    compiled = {
+        'model_type': COMPILED_MODEL_TYPE,
+        'forest': forest.to_dict(),
+        'columns': list(bundle['columns']),
+        'categorical_cols': list(bundle['categorical_cols']),
+        'categories': {col: list(categories[col]) for col in bundle['categorical_cols']},
+    }
+    if 'impute_values' in bundle:
+        compiled['impute_values'] = dict(bundle['impute_values'])
+    if bundle.get('drift_baseline') is not None:
+        compiled['drift_baseline'] = bundle['drift_baseline']
+    dump_atomic(compiled, path)
+    return compiled
+
+
+def _verification_matrix(bundle, csv_path):
+    # Clean the CSV the way train_model.py does and encode it in bundle column order
+    import pandas as pd
+
+    X = pd.read_csv(csv_path)[bundle['columns']]
+    for col in bundle['columns']:
+        if col in bundle['categorical_cols']:
+            X[col] = X[col].fillna(X[col].mode()[0])
+            X[col] = bundle['label_encoders'][col].transform(X[col])
+        else:
+            X[col] = X[col].astype(float).fillna(X[col].mean())
+    return X
+
+
+def verify(bundle, forest, csv_path):
+    X = _verification_matrix(bundle, csv_path)
+    model = bundle['model']
+    # Sequential accumulation order, so sklearn's own probabilities are deterministic
+    params = model.get_params()
+    model.set_params(n_jobs=1)
+    try:
+        expected_proba = model.predict_proba(X)
+        expected = model.predict(X)
+    finally:
+        model.set_params(n_jobs=params['n_jobs'])
+    proba = forest.predict_proba(X)
+    return {
+        'rows': len(X),
+        'prediction_mismatches': int((forest.predict(X) != expected).sum()),
+        'probabilities_identical': bool(np.array_equal(proba, expected_proba)),
+        'max_abs_proba_diff': float(np.abs(proba - expected_proba).max()),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile the RandomForest bundle into flat node arrays')
+    parser.add_argument('--bundle', default='student_performance_model_optimized.joblib')
+    parser.add_argument('--output', default='student_performance_model_compiled.joblib')
+    parser.add_argument('--verify-csv', default='student_performance_prediction.csv',
+                        help='CSV to check predictions against scikit-learn (empty string to skip)')
+    args = parser.parse_args()
+
+    bundle = load(args.bundle)
+    compiled = dump_compiled(bundle, args.output)
+    forest = CompiledForest.from_dict(compiled['forest'])
+    print(f'Compiled {forest.n_trees} trees ({forest.n_nodes} nodes, depth {forest.max_depth}) to {args.output}')
+    if args.verify_csv:
+        report = verify(bundle, forest, args.verify_csv)
+        print(f"Verified {report['rows']} rows: {report['prediction_mismatches']} prediction mismatches, "
+              f"probabilities {'identical' if report['probabilities_identical'] else 'differ'} "
+              f"(max abs diff {report['max_abs_proba_diff']:.3g})")
+        if report['prediction_mismatches'] or not report['probabilities_identical']:
+            raise SystemExit(1)
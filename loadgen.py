@@ -0,0 +1,212 @@
+import argparse
+import http.client
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+# Load generator that replays student_performance_prediction.csv against the app.
+#
+#   python loadgen.py --test-client --concurrency 16 --duration 10
+#   python loadgen.py --url http://127.0.0.1:5000 --rate 200 --mode json --batch-size 20
+#   python loadgen.py --url http://127.0.0.1:5000 --step 4,64,4 --duration 5
+#
+# Closed loop (--concurrency): N clients send back-to-back requests.
+# Open loop (--rate): requests are issued on a fixed schedule and latency is measured
+# from the scheduled send time, so a slow server can't hide its queueing delay.
+# Step load (--step start,stop,step): raises concurrency (or rate) each step and reports
+# where throughput stops growing.
+
+FEATURES = ['Study Hours per Week', 'Attendance Rate', 'Previous Grades',
+            'Participation in Extracurricular Activities', 'Parent Education Level']
+
+
+def build_requests(csv_path, n, mode='form', batch_size=1, seed=0):
+    # (method, path, body, content type) tuples built from rows sampled from the dataset
+    df = pd.read_csv(csv_path)[FEATURES].dropna()
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(0, len(df), size=n * batch_size)].to_dict('records')
+    if mode == 'form':
+        return [('POST', '/', urlencode(row).encode(), 'application/x-www-form-urlencoded') for row in rows]
+    return [('POST', '/api/predict', json.dumps(rows[i:i + batch_size]).encode(), 'application/json')
+            for i in range(0, len(rows), batch_size)]
+
+
+class HttpTarget:
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, method, path, body, content_type):
+        # One keep-alive connection per client thread, reopened after any failure
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path, body=body, headers={'Content-Type': content_type})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return None
+
+
+class TestClientTarget:
+    # Fully in-process: drives app.py through Flask's test client, no sockets involved
+    def __init__(self):
+        import app
+
+        self.app = app.app
+        self._local = threading.local()
+
+    def send(self, method, path, body, content_type):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        try:
+            return client.open(path, method=method, data=body, content_type=content_type).status_code
+        except Exception:
+            return None
+
+
+def run_closed(target, requests, concurrency, duration):
+    samples = []
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            request = requests[next(counter) % len(requests)]
+            start = time.perf_counter()
+            status = target.send(*request)
+            samples.append((time.perf_counter() - start, status))
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def run_open(target, requests, rate, duration, max_workers=256):
+    samples = []
+
+    def fire(request, scheduled):
+        status = target.send(*request)
+        samples.append((time.perf_counter() - scheduled, status))
+
+    total = int(rate * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, requests[i % len(requests)], scheduled)
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    statuses = {}
+    for _, status in samples:
+        key = str(status) if status is not None else 'connection_error'
+        statuses[key] = statuses.get(key, 0) + 1
+    errors = sum(count for key, count in statuses.items() if key != '200')
+    summary = {
+        'requests': len(samples),
+        'seconds': elapsed,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'statuses': statuses,
+    }
+    if len(latencies):
+        for q in (50, 90, 99):
+            summary[f'p{q}_ms'] = float(np.percentile(latencies, q))
+        summary['max_ms'] = float(latencies.max())
+    return summary
+
+
+def format_summary(label, s):
+    if not s['requests']:
+        return f'{label:>14}  no requests completed'
+    return (f"{label:>14}  {s['throughput_rps']:8.1f} req/s  p50 {s['p50_ms']:7.1f} ms  p90 {s['p90_ms']:7.1f} ms  "
+            f"p99 {s['p99_ms']:7.1f} ms  errors {s['error_rate']:.2%}")
+
+
+def step_load(target, requests, levels, duration, open_loop, max_workers, max_error_rate=0.01, min_gain=0.05):
+    # Saturation: the first level whose throughput doesn't beat the best so far by min_gain,
+    # or whose error rate passes max_error_rate
+    steps = []
+    best = 0.0
+    saturation = None
+    for level in levels:
+        if open_loop:
+            summary = summarize(*run_open(target, requests, level, duration, max_workers))
+        else:
+            summary = summarize(*run_closed(target, requests, level, duration))
+        summary['level'] = level
+        steps.append(summary)
+        print(format_summary(f"{'rate' if open_loop else 'conc'} {level}", summary), flush=True)
+        if saturation is None and (summary['error_rate'] > max_error_rate
+                                   or summary['throughput_rps'] < best * (1 + min_gain)):
+            saturation = steps[-2]['level'] if len(steps) > 1 else level
+        best = max(best, summary['throughput_rps'])
+    return steps, saturation
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay the dataset against the app and report latency')
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:5000')
+    target_group.add_argument('--test-client', action='store_true', help='Drive app.py in-process')
+    load_group = parser.add_mutually_exclusive_group()
+    load_group.add_argument('--concurrency', type=int, default=8, help='Closed-loop clients')
+    load_group.add_argument('--rate', type=float, help='Open-loop target requests per second')
+    parser.add_argument('--step', help='Step load over concurrency (or rate with --rate): start,stop,step')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run or per step')
+    parser.add_argument('--mode', choices=['form', 'json'], default='form')
+    parser.add_argument('--batch-size', type=int, default=1, help='Records per JSON request')
+    parser.add_argument('--max-workers', type=int, default=256, help='Open-loop in-flight request limit')
+    parser.add_argument('--csv', default='student_performance_prediction.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    target = TestClientTarget() if args.test_client else HttpTarget(args.url)
+    requests = build_requests(args.csv, 5000, args.mode, args.batch_size, args.seed)
+    open_loop = args.rate is not None
+
+    if args.step:
+        start, stop, step = (float(v) if open_loop else int(v) for v in args.step.split(','))
+        levels = list(np.arange(start, stop + step / 2, step)) if open_loop else list(range(start, stop + 1, step))
+        steps, saturation = step_load(target, requests, levels, args.duration, open_loop, args.max_workers)
+        print(f"Saturation at {'rate' if open_loop else 'concurrency'} ~{saturation}" if saturation is not None
+              else 'No saturation within the tested range')
+        result = {'steps': steps, 'saturation_level': saturation}
+    else:
+        if open_loop:
+            result = summarize(*run_open(target, requests, args.rate, args.duration, args.max_workers))
+            label = f'rate {args.rate:g}'
+        else:
+            result = summarize(*run_closed(target, requests, args.concurrency, args.duration))
+            label = f'conc {args.concurrency}'
+        print(format_summary(label, result))
+        print(f"statuses: {result['statuses']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, default=float)
@@ -0,0 +1,187 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+from joblib import load
+
+from encoder import FeatureEncoder
+
+# Lookup-table serving engine.
+# The model has five inputs: three bounded numerics and two small categoricals. This
+# evaluates the forest once at every point of a quantized grid over that space and
+# stores the pass probability as fixed-point integers in one C-ordered array. Serving
+# rounds each numeric onto its grid (clipping to RANGES), and a row's prediction is a
+# single array read at sum(index * stride); no trees are walked.
+#
+#   python lookup.py --resolution 1.0
+#   MODEL_PATH=student_performance_model_lookup.joblib python app.py
+#
+# The bundle is stored uncompressed, so ServingModel memory-maps the table. The build
+# reports table size and agreement with the exact model on the CSV; inputs between grid
+# points or outside RANGES are where the two can differ. Every cell keeps the exact
+# model's Pass/Fail at its grid point (its probability is nudged across 0.5 if needed).
+
+LOOKUP_MODEL_TYPE = 'LookupTable'
+OUTPUT_PATH = 'student_performance_model_lookup.joblib'
+RANGES = {
+    'Study Hours per Week': (0.0, 168.0),
+    'Attendance Rate': (0.0, 100.0),
+    'Previous Grades': (0.0, 100.0),
+}
+DTYPES = {'uint8': np.uint8, 'uint16': np.uint16}
+
+
+class LookupTable:
+    def __init__(self, axes, table, classes):
+        # axes: per bundle column, {'low', 'step', 'size'} (categoricals: low 0, step 1)
+        self.axes = axes
+        self.table = table
+        self.classes_ = np.asarray(classes)
+        self.scale = np.iinfo(table.dtype).max
+        self._flat = table.reshape(-1)
+        self._low = np.array([axis['low'] for axis in axes], dtype=np.float64)
+        self._inverse_step = 1.0 / np.array([axis['step'] for axis in axes], dtype=np.float64)
+        self._last = np.array([axis['size'] - 1 for axis in axes], dtype=np.float64)
+        self._strides = np.array(table.strides, dtype=np.intp) // table.itemsize
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['axes'], data['table'], data['classes'])
+
+    def to_dict(self):
+        return {'axes': self.axes, 'table': self.table, 'classes': self.classes_}
+
+    @property
+    def n_cells(self):
+        return self.table.size
+
+    def index(self, X):
+        # Flat cell of every row: nearest grid point per feature, clipped to the grid
+        position = np.rint((np.asarray(X, dtype=np.float64) - self._low) * self._inverse_step)
+        np.clip(position, 0, self._last, out=position)
+        return position.astype(np.intp) @ self._strides
+
+    def pass_probability(self, X):
+        return self._flat[self.index(X)] / self.scale
+
+    def predict_proba(self, X):
+        # Binary tables store the probability of classes_[1]
+        p = self.pass_probability(X)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        # Stored values never sit on 0.5 (scale is odd), so this matches argmax exactly
+        return self.classes_.take((self._flat[self.index(X)] > self.scale // 2).astype(np.intp))
+
+
+def grid_axes(bundle, resolution):
+    categories = FeatureEncoder.from_bundle(bundle).categories
+    axes = []
+    for col in bundle['columns']:
+        if col in categories:
+            axes.append({'low': 0.0, 'step': 1.0, 'size': len(categories[col])})
+        else:
+            low, high = RANGES[col]
+            axes.append({'low': low, 'step': resolution, 'size': int(math.floor((high - low) / resolution + 1e-9)) + 1})
+    return axes
+
+
+def build_table(predictor, axes, dtype=np.uint16, chunk_size=1 << 18, progress=None):
+    # Scores the grid chunk by chunk, so memory stays at the table plus one chunk of rows
+    classes = np.asarray(predictor.classes_)
+    if len(classes) != 2:
+        raise ValueError('Lookup tables support binary classifiers only')
+    shape = tuple(axis['size'] for axis in axes)
+    low = np.array([axis['low'] for axis in axes])
+    step = np.array([axis['step'] for axis in axes])
+    table = np.empty(shape, dtype=dtype)
+    flat = table.reshape(-1)
+    scale = np.iinfo(dtype).max
+    half = scale // 2
+    for start in range(0, flat.size, chunk_size):
+        cells = np.arange(start, min(start + chunk_size, flat.size))
+        X = (np.stack(np.unravel_index(cells, shape), axis=1) * step + low).astype(np.float32)
+        proba = predictor.predict_proba(X)
+        passed = proba.argmax(axis=1) == 1
+        q = np.rint(proba[:, 1] * scale)
+        # Keep each cell's label: Pass strictly above half the scale, Fail at or below it
+        q = np.where(passed, np.maximum(q, half + 1), np.minimum(q, half))
+        flat[start:start + len(cells)] = q
+        if progress is not None:
+            progress(start + len(cells), flat.size)
+    return table
+
+
+def dump_lookup(bundle, path, lookup):
+    from forest import dump_atomic
+
+    compiled = {
+        'model_type': LOOKUP_MODEL_TYPE,
+        'lookup': lookup.to_dict(),
+        'columns': list(bundle['columns']),
+        'categorical_cols': list(bundle['categorical_cols']),
+        'categories': FeatureEncoder.from_bundle(bundle).categories,
+    }
+    for key in ('impute_values', 'drift_baseline'):
+        if bundle.get(key) is not None:
+            compiled[key] = bundle[key]
+    # Uncompressed, so the table can be memory-mapped when served (and replaced atomically,
+    # never rewritten in place under a serving process)
+    dump_atomic(compiled, path)
+    return compiled
+
+
+def main(args):
+    from compact_model import evaluation_data, format_report, measure
+    from forest import predictor_from_bundle
+
+    bundle = load(args.bundle)
+    axes = grid_axes(bundle, args.resolution)
+    dtype = DTYPES[args.dtype]
+    n_cells = math.prod(axis['size'] for axis in axes)
+    table_mb = n_cells * np.dtype(dtype).itemsize / 2 ** 20
+    print(f"Grid {' x '.join(str(axis['size']) for axis in axes)} = {n_cells:,} cells, {table_mb:.1f} MB as {args.dtype}")
+    if table_mb > args.max_mb:
+        raise SystemExit(f'Table would exceed --max-mb {args.max_mb:g}; use a coarser --resolution')
+
+    # The estimator's own walk is faster than the compiled one on batches this large
+    predictor = predictor_from_bundle(bundle, compiled=False)
+    if hasattr(predictor, 'n_jobs'):
+        predictor.set_params(n_jobs=args.n_jobs)
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f'\r  {done / total:6.1%} of cells scored', end='', flush=True)
+
+    table = build_table(predictor, axes, dtype, progress=progress)
+    build_seconds = time.perf_counter() - start
+    print(f'\nBuilt in {build_seconds:.1f}s')
+    lookup = LookupTable(axes, table, predictor.classes_)
+    dump_lookup(bundle, args.output, lookup)
+
+    X_all, X_eval, y_eval = evaluation_data(bundle, args.csv, args.seed)
+    exact = predictor_from_bundle(bundle)
+    reference = exact.predict(X_all)
+    proba_error = np.abs(lookup.pass_probability(X_all) - exact.predict_proba(X_all)[:, 1])
+    report = {
+        'exact': measure(args.bundle, X_all, X_eval, y_eval, reference),
+        'lookup': measure(args.output, X_all, X_eval, y_eval, reference),
+    }
+    print(format_report(report['exact'], report['lookup']))
+    print(f'Table {table.nbytes / 2 ** 20:.1f} MB in {os.path.getsize(args.output) / 2 ** 20:.1f} MB file; '
+          f'probability error on the CSV: mean {proba_error.mean():.4f}, max {proba_error.max():.4f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute the forest over a quantized input grid')
+    parser.add_argument('--bundle', default='student_performance_model_optimized.joblib')
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--csv', default='student_performance_prediction.csv')
+    parser.add_argument('--resolution', type=float, default=1.0, help='Grid step of the numeric features')
+    parser.add_argument('--dtype', choices=sorted(DTYPES), default='uint16', help='Fixed-point type of the stored probability')
+    parser.add_argument('--max-mb', type=float, default=1024, help='Refuse to build a larger table')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the training split (accuracy is on its holdout)')
+    main(parser.parse_args())
@@ -0,0 +1,146 @@
+import bisect
+import threading
+import time
+
+# Hot-path instrumentation exposed in Prometheus text format.
+# Stage timings and batch sizes go into fixed-bucket histograms and requests into
+# counters. Other components (cache, micro-batcher, model) are read through collector
+# callbacks at scrape time only. While recording is disabled, timers are a shared
+# no-op object, so the instrumented code pays a single attribute check.
+
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'stage', 'start')
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+
+class Metrics:
+    def __init__(self, namespace, enabled=False):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(f'{namespace}_stage_seconds', 'Time spent per request stage',
+                                       LATENCY_BUCKETS, ('stage',))
+        self.batch_size = Histogram(f'{namespace}_batch_size', 'Rows sent to the model per call', BATCH_BUCKETS)
+        self.requests = Counter(f'{namespace}_requests_total', 'Requests handled', ('endpoint',))
+        self._collectors = []
+
+    def time(self, stage):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self.stage_seconds, stage)
+
+    def count_request(self, endpoint):
+        if self.enabled:
+            self.requests.inc(endpoint)
+
+    def observe_batch(self, size):
+        if self.enabled:
+            self.batch_size.observe(size)
+
+    def add_collector(self, collect):
+        # collect() returns [(name, type, help, [(labels dict, value), ...]), ...] at scrape time
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = self.stage_seconds.render() + self.batch_size.render() + self.requests.render()
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(labels.keys(), labels.values())} {_number(value)}')
+        return '\n'.join(lines) + '\n'
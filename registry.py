@@ -0,0 +1,159 @@
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# On-disk model registry and hot-reload watcher.
+#
+#   <root>/versions/<version>.joblib   immutable bundle files
+#   <root>/CURRENT                     name of the version to serve
+#
+# Publishing copies a bundle in and flips CURRENT with an atomic rename. The watcher
+# polls CURRENT, loads and smoke-tests a new version in the background, and only then
+# hands it over, so a broken bundle never replaces the one being served.
+
+
+def current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.current_file = os.path.join(root, 'CURRENT')
+
+    def path(self, version):
+        return os.path.join(self.versions_dir, f'{version}.joblib')
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name[:-len('.joblib')] for name in os.listdir(self.versions_dir) if name.endswith('.joblib'))
+
+    def current_version(self):
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _atomic_write(self, path, write):
+        # Write next to the target and rename over it, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            # mkstemp creates the file 0600; give it the permissions a plain open() would
+            os.chmod(tmp, 0o666 & ~current_umask())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def publish(self, bundle_path, version=None, activate=True):
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        if not version or os.sep in version or version.startswith('.'):
+            raise ValueError(f'Invalid model version name: {version!r}')
+        os.makedirs(self.versions_dir, exist_ok=True)
+        target = self.path(version)
+        if os.path.exists(target):
+            raise ValueError(f'Model version {version!r} already exists')
+        with open(bundle_path, 'rb') as src:
+            self._atomic_write(target, lambda dst: shutil.copyfileobj(src, dst))
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if not os.path.exists(self.path(version)):
+            raise ValueError(f'Unknown model version: {version!r}')
+        self._atomic_write(self.current_file, lambda f: f.write(version.encode() + b'\n'))
+
+
+class ModelWatcher:
+    def __init__(self, registry, load, on_swap, current_version=None, interval=5.0, logger=None):
+        # load(version) must return a ready, smoke-tested model or raise
+        self.registry = registry
+        self.load = load
+        self.on_swap = on_swap
+        self.current_version = current_version
+        self.interval = interval
+        self.logger = logger
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        # One poll: returns True when a new version was swapped in
+        try:
+            version = self.registry.current_version()
+        except Exception:
+            # Unreadable CURRENT (permissions, a half-mounted volume, ...): try again next poll
+            if self.logger:
+                self.logger.exception('Could not read the current model version')
+            return False
+        if version is None or version == self.current_version or version == self._failed_version:
+            return False
+        try:
+            model = self.load(version)
+        except Exception:
+            # Keep serving the current model and don't retry this version until CURRENT changes
+            self._failed_version = version
+            if self.logger:
+                self.logger.exception('Rejected model version %s', version)
+            return False
+        self.on_swap(model)
+        self.current_version = version
+        self._failed_version = None
+        if self.logger:
+            self.logger.info('Now serving model version %s', version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # An error in one poll (e.g. in on_swap) must not end the watcher thread
+            try:
+                self.check()
+            except Exception:
+                if self.logger:
+                    self.logger.exception('Model watcher poll failed')
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage the versioned model registry')
+    parser.add_argument('--root', default='models', help='Registry directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help='Add a bundle as a new version')
+    publish.add_argument('bundle')
+    publish.add_argument('--version')
+    publish.add_argument('--no-activate', action='store_true', help="Don't make it the current version")
+    activate = commands.add_parser('activate', help='Serve an existing version')
+    activate.add_argument('version')
+    commands.add_parser('list', help='Show versions, marking the current one')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        version = registry.publish(args.bundle, args.version, activate=not args.no_activate)
+        print(f'Published {args.bundle} as version {version}')
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f'Current version is now {args.version}')
+    else:
+        current = registry.current_version()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
@@ -0,0 +1,221 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+from encoder import FeatureEncoder
+from forest import COMPILED_MODEL_TYPE, CompiledForest, compile_forest, dump_compiled, predictor_from_bundle
+from lookup import LOOKUP_MODEL_TYPE
+
+# Streaming bulk scorer.
+# Reads a student CSV (same schema as student_performance_prediction.csv) in fixed-size
+# chunks, imputes and encodes each chunk the way train_model.py does, and appends
+# "Student ID,prediction,probability" rows to the output. Memory stays bounded by the
+# chunk size however large the input is.
+#
+# With --contributions, a baseline column and one "<feature> contribution" column per
+# feature are added: the path decomposition of the pass probability (baseline plus the
+# contributions of a row add up to its probability).
+#
+# With --workers N, chunks are preprocessed and scored in N processes. The model is
+# written once as an uncompressed compiled bundle and every worker memory-maps it
+# read-only, so all processes share the same pages instead of unpickling a copy each.
+
+ID_COLUMN = 'Student ID'
+OUTPUT_COLUMNS = [ID_COLUMN, 'prediction', 'probability']
+
+
+def read_chunks(path, columns, chunksize):
+    return pd.read_csv(path, usecols=[ID_COLUMN] + list(columns), chunksize=chunksize,
+                       dtype={ID_COLUMN: str})
+
+
+def chunk_stats(chunks, numerical_cols, categorical_cols):
+    # (impute_values, sorted labels seen per categorical) in one constant-memory pass over
+    # DataFrame chunks: running sums for the means, label counts for the modes.
+    # Shared with train_model.py, so training and scoring impute the same way.
+    sums = dict.fromkeys(numerical_cols, 0.0)
+    counts = dict.fromkeys(numerical_cols, 0)
+    label_counts = {col: pd.Series(dtype=np.int64) for col in categorical_cols}
+    for chunk in chunks:
+        for col in numerical_cols:
+            values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+            sums[col] += np.nansum(values)
+            counts[col] += int(np.count_nonzero(~np.isnan(values)))
+        for col in categorical_cols:
+            label_counts[col] = label_counts[col].add(chunk[col].value_counts(), fill_value=0)
+
+    impute_values = {col: float(sums[col] / counts[col]) if counts[col] else 0.0 for col in numerical_cols}
+    categories = {}
+    for col in categorical_cols:
+        # Categorical columns also count labels that never occur
+        seen = label_counts[col][label_counts[col] > 0].sort_index()
+        # Ties resolve to the smallest label, like Series.mode()
+        impute_values[col] = seen.idxmax()
+        categories[col] = seen.index.tolist()
+    return impute_values, categories
+
+
+def streaming_impute_values(path, bundle, chunksize):
+    # Training-time fill values are not stored in older bundles; derive them in one extra pass
+    numerical_cols = [col for col in bundle['columns'] if col not in bundle['categorical_cols']]
+    impute_values, _ = chunk_stats(read_chunks(path, bundle['columns'], chunksize), numerical_cols,
+                                   bundle['categorical_cols'])
+    return impute_values
+
+
+def prepare_chunk(chunk, encoder, impute_values):
+    # Impute missing values, treat labels the model has never seen as missing, then encode
+    unknown = 0
+    for col in encoder.columns:
+        if col in encoder.categorical_cols:
+            known = chunk[col].isin(encoder.categories[col])
+            unknown += int((~known & chunk[col].notna()).sum())
+            chunk[col] = chunk[col].where(known, impute_values[col])
+        else:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(impute_values[col])
+    return encoder.encode_columns(chunk), unknown
+
+
+def contribution_columns(columns):
+    return ['baseline'] + [f'{col} contribution' for col in columns]
+
+
+def explainer_from_bundle(bundle):
+    # Compiled forest with per-node contributions, for --contributions
+    if bundle.get('model_type') == COMPILED_MODEL_TYPE:
+        forest = CompiledForest.from_dict(bundle['forest'])
+    else:
+        try:
+            forest = compile_forest(bundle['model'])
+        except (KeyError, TypeError):
+            raise ValueError('Contributions need a tree-ensemble bundle') from None
+    forest.prepare_contributions(len(bundle['columns']))
+    return forest
+
+
+def score_chunk(chunk, encoder, predictor, impute_values, explainer=None):
+    X, unknown = prepare_chunk(chunk, encoder, impute_values)
+    if explainer is not None:
+        # One walk gives both the probabilities and their decomposition
+        predictor = explainer
+        proba, bias, contributions = explainer.explain(X)
+    else:
+        proba = predictor.predict_proba(X)
+    classes = list(predictor.classes_)
+    pass_index = classes.index(1)
+    labels = np.where(predictor.classes_.take(proba.argmax(axis=1)) == 1, 'Pass', 'Fail')
+    scored = pd.DataFrame({
+        ID_COLUMN: chunk[ID_COLUMN].to_numpy(),
+        'prediction': labels,
+        'probability': proba[:, pass_index],
+    })
+    if explainer is not None:
+        names = contribution_columns(encoder.columns)
+        scored[names[0]] = bias[pass_index]
+        scored[names[1:]] = contributions[:, :, pass_index]
+    return scored, unknown
+
+
+def score_file(input_path, output_path, bundle, chunksize=100_000, progress=None, workers=1, bundle_path=None,
+               contributions=False):
+    impute_values = bundle.get('impute_values') or streaming_impute_values(input_path, bundle, chunksize)
+    if workers > 1:
+        scored_chunks = _score_parallel(input_path, bundle, bundle_path, chunksize, impute_values, workers,
+                                        contributions)
+    else:
+        encoder = FeatureEncoder.from_bundle(bundle)
+        # Chunks are large, so keep sklearn's estimator when the bundle has one
+        predictor = predictor_from_bundle(bundle, compiled=False)
+        explainer = explainer_from_bundle(bundle) if contributions else None
+        scored_chunks = (score_chunk(chunk, encoder, predictor, impute_values, explainer)
+                         for chunk in read_chunks(input_path, encoder.columns, chunksize))
+
+    columns = OUTPUT_COLUMNS + (contribution_columns(bundle['columns']) if contributions else [])
+    rows = unknown = 0
+    start = time.perf_counter()
+    with open(output_path, 'w', newline='') as out:
+        out.write(','.join(columns) + '\n')
+        for scored, chunk_unknown in scored_chunks:
+            scored.to_csv(out, header=False, index=False)
+            rows += len(scored)
+            unknown += chunk_unknown
+            if progress:
+                progress(rows, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'seconds': elapsed, 'rows_per_sec': rows / elapsed if elapsed else 0.0,
+            'unknown_labels': unknown, 'workers': workers}
+
+
+_worker_state = None
+
+
+def _init_worker(model_path, impute_values, contributions):
+    # Arrays come back as read-only memmaps over the shared file
+    global _worker_state
+    bundle = load(model_path, mmap_mode='r')
+    explainer = explainer_from_bundle(bundle) if contributions else None
+    _worker_state = (FeatureEncoder.from_bundle(bundle), predictor_from_bundle(bundle), impute_values, explainer)
+
+
+def _score_in_worker(chunk):
+    return score_chunk(chunk, *_worker_state)
+
+
+def _score_parallel(input_path, bundle, bundle_path, chunksize, impute_values, workers, contributions=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Compiled and lookup bundles are already written uncompressed, so workers map the file as-is
+        if bundle.get('model_type') in (COMPILED_MODEL_TYPE, LOOKUP_MODEL_TYPE) and bundle_path:
+            model_path = bundle_path
+        else:
+            # Non-forest models cannot be compiled; their bundle is re-dumped uncompressed instead
+            model_path = os.path.join(tmp, 'model.joblib')
+            try:
+                dump_compiled(bundle, model_path)
+            except (KeyError, TypeError):
+                from joblib import dump
+                dump(bundle, model_path)
+
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(model_path, impute_values, contributions)) as pool:
+            # Keep a bounded number of chunks in flight so memory does not grow with the input
+            pending = deque()
+            for chunk in read_chunks(input_path, bundle['columns'], chunksize):
+                pending.append(pool.apply_async(_score_in_worker, (chunk,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+
+def _report_progress(rows, elapsed):
+    print(f'\r{rows:,} rows scored ({rows / elapsed:,.0f} rows/s)', end='', file=sys.stderr, flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a student CSV in constant memory')
+    parser.add_argument('input', help='CSV in the same schema as student_performance_prediction.csv')
+    parser.add_argument('output', help='Where to write Student ID,prediction,probability')
+    parser.add_argument('--bundle', default='student_performance_model_optimized.joblib')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='Rows per chunk')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scoring processes sharing one memory-mapped model (0 = one per core)')
+    parser.add_argument('--contributions', action='store_true',
+                        help='Add the baseline and per-feature contributions to the pass probability')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count()
+    report = score_file(args.input, args.output, load(args.bundle), args.chunksize,
+                        progress=_report_progress, workers=workers, bundle_path=args.bundle,
+                        contributions=args.contributions)
+    print(file=sys.stderr)
+    print(f"Scored {report['rows']:,} rows in {report['seconds']:.2f}s "
+          f"({report['rows_per_sec']:,.0f} rows/s, {report['workers']} worker(s)) -> {args.output}")
+    if report['unknown_labels']:
+        print(f"{report['unknown_labels']:,} unknown category labels were imputed")
@@ -0,0 +1,82 @@
+import math
+import os
+import time
+
+from joblib import load
+
+from drift import DriftMonitor
+from encoder import FeatureEncoder
+from forest import predictor_from_bundle
+
+# A loaded model bundle ready to serve: the compiled encoder, the predictor and
+# the helpers app.py needs to score encoded rows and warm them up.
+
+# Batches of at least this many rows go to sklearn's estimator when the bundle has one:
+# the flat walk wins on small batches, sklearn's Cython walk from about a thousand rows
+BULK_ROWS = 1000
+
+
+class ServingModel:
+    def __init__(self, bundle, source=None, version=None, drift_baseline=None, drift_window=None,
+                 bulk_rows=BULK_ROWS):
+        self.bundle = bundle
+        self.source = source
+        # Registry version name, or the bundle's file name when served from a plain path
+        self.version = version or (os.path.splitext(os.path.basename(source))[0] if source else 'unversioned')
+        self.columns = bundle['columns']
+        self.categorical_cols = bundle['categorical_cols']
+        # Compile the preprocessing and the forest once so requests skip pandas and sklearn's overhead
+        self.encoder = FeatureEncoder.from_bundle(bundle)
+        self.predictor = predictor_from_bundle(bundle)
+        self.bulk_rows = bulk_rows
+        self.bulk_predictor = (predictor_from_bundle(bundle, compiled=False)
+                               if 'model' in bundle and self.predictor is not bundle['model'] else None)
+        self.pass_index = list(self.predictor.classes_).index(1)
+        # Per-node contributions are built once here, so explaining a batch costs one extra walk
+        self.explainable = hasattr(self.predictor, 'explain')
+        if hasattr(self.predictor, 'prepare_contributions'):
+            self.predictor.prepare_contributions(len(self.columns))
+        # Input drift against the training baseline (embedded by train_model.py, or passed in)
+        baseline = bundle.get('drift_baseline') or drift_baseline
+        self.drift = (DriftMonitor(baseline, self.columns, self.encoder.categories, window=drift_window)
+                      if baseline else None)
+
+    @classmethod
+    def load(cls, path, version=None, **kwargs):
+        # Uncompressed bundles (compiled forests, lookup tables) are memory-mapped: their arrays
+        # are paged in on demand and shared by every worker process through the page cache
+        with open(path, 'rb') as f:
+            uncompressed = f.read(1) == b'\x80'
+        return cls(load(path, mmap_mode='r' if uncompressed else None), source=path, version=version, **kwargs)
+
+    def score(self, X):
+        # (label, pass probability) per encoded row, from a single model call
+        predictor = self.predictor
+        if self.bulk_predictor is not None and len(X) >= self.bulk_rows:
+            predictor = self.bulk_predictor
+        proba = predictor.predict_proba(X)
+        labels = predictor.classes_.take(proba.argmax(axis=1))
+        return [('Pass' if label == 1 else 'Fail', float(p)) for label, p in zip(labels, proba[:, self.pass_index])]
+
+    def explain(self, X):
+        # Baseline pass probability and, per row, each column's contribution to it
+        if not self.explainable:
+            raise ValueError(f'Model {self.version} does not support contributions')
+        _, bias, contributions = self.predictor.explain(X)
+        return float(bias[self.pass_index]), [dict(zip(self.columns, row.tolist()))
+                                              for row in contributions[:, :, self.pass_index]]
+
+    def sample_record(self):
+        # A valid raw record: impute values when the bundle has them, otherwise zeros and first labels
+        impute_values = self.bundle.get('impute_values') or {}
+        return {col: impute_values.get(col, self.encoder.categories[col][0] if col in self.categorical_cols else 0.0)
+                for col in self.columns}
+
+    def warmup(self):
+        # Push one record through every hot-path stage so first-call costs are paid up front.
+        # Doubles as a smoke test: a bundle that can't produce a sane prediction is rejected.
+        start = time.perf_counter()
+        [(label, probability)] = self.score(self.encoder.encode([self.sample_record()]))
+        if label not in ('Pass', 'Fail') or not math.isfinite(probability) or not 0.0 <= probability <= 1.0:
+            raise ValueError(f'Smoke prediction failed for model {self.version}: {label!r}, {probability!r}')
+        return time.perf_counter() - start
@@ -0,0 +1,187 @@
+const form = document.getElementById('predictionForm');
+const progressFill = document.getElementById('progressFill');
+const submitBtn = document.getElementById('submitBtn');
+const formSummary = document.getElementById('formSummary');
+const summaryContent = document.getElementById('summaryContent');
+const result = document.getElementById('result');
+const predictionText = document.getElementById('predictionText');
+const explanation = document.getElementById('explanation');
+
+const fields = form.querySelectorAll('input[required], select[required]');
+let filledFields = 0;
+
+// Validation functions
+function validateStudyHours(value) {
+    return value >= 0 && value <= 168;
+}
+
+function validateAttendance(value) {
+    return value >= 0 && value <= 100;
+}
+
+function validateGrades(value) {
+    return value >= 0 && value <= 100;
+}
+
+function validateField(field) {
+    const group = field.closest('.form-group');
+    const value = parseFloat(field.value);
+    let isValid = true;
+
+    if (field.type === 'number' && field.value !== '') {
+        if (field.id === 'study-hours') {
+            isValid = validateStudyHours(value);
+        } else if (field.id === 'attendance') {
+            isValid = validateAttendance(value);
+        } else if (field.id === 'grades') {
+            isValid = validateGrades(value);
+        }
+    }
+
+    if (field.type === 'number' && field.value === '') {
+        isValid = false;
+    }
+
+    if (field.tagName === 'SELECT' && field.value === '') {
+        isValid = false;
+    }
+
+    // Update visual feedback
+    group.classList.remove('error', 'success');
+    if (field.value !== '') {
+        group.classList.add(isValid ? 'success' : 'error');
+    }
+
+    return isValid;
+}
+
+function updateProgress() {
+    filledFields = 0;
+    let allValid = true;
+
+    fields.forEach(field => {
+        if (field.value !== '' && validateField(field)) {
+            filledFields++;
+        } else if (field.value !== '') {
+            allValid = false;
+        }
+    });
+
+    const progress = (filledFields / fields.length) * 100;
+    progressFill.style.width = progress + '%';
+
+    // Enable submit button only if all fields are filled and valid
+    submitBtn.disabled = filledFields !== fields.length || !allValid;
+
+    // Show summary when form is complete
+    if (filledFields === fields.length && allValid) {
+        updateSummary();
+        formSummary.classList.add('show');
+    } else {
+        formSummary.classList.remove('show');
+    }
+}
+
+function updateSummary() {
+    const studyHours = document.getElementById('study-hours').value;
+    const attendance = document.getElementById('attendance').value;
+    const grades = document.getElementById('grades').value;
+    const extracurricular = document.getElementById('extracurricular').value;
+    const parentEducation = document.getElementById('parent-education').value;
+
+    summaryContent.innerHTML = `
+        <div class="summary-item">
+            <span>Study Hours/Week:</span>
+            <span>${studyHours}</span>
+        </div>
+        <div class="summary-item">
+            <span>Attendance Rate:</span>
+            <span>${attendance}%</span>
+        </div>
+        <div class="summary-item">
+            <span>Previous Grades:</span>
+            <span>${grades}</span>
+        </div>
+        <div class="summary-item">
+            <span>Extracurricular:</span>
+            <span>${extracurricular}</span>
+        </div>
+        <div class="summary-item">
+            <span>Parent Education:</span>
+            <span>${parentEducation}</span>
+        </div>
+    `;
+}
+
+// Add event listeners
+fields.forEach(field => {
+    field.addEventListener('input', updateProgress);
+    field.addEventListener('blur', () => validateField(field));
+    field.addEventListener('change', updateProgress);
+});
+
+// What moved the pass probability, largest effect first, in percentage points
+function showExplanation(contributions) {
+    const rows = Object.entries(contributions)
+        .sort((a, b) => Math.abs(b[1]) - Math.abs(a[1]))
+        .map(([feature, value]) => {
+            const row = document.createElement('div');
+            row.className = 'summary-item';
+            const name = document.createElement('span');
+            name.textContent = feature;
+            const points = document.createElement('span');
+            points.textContent = `${value >= 0 ? '+' : ''}${(value * 100).toFixed(1)} pts`;
+            row.append(name, points);
+            return row;
+        });
+    explanation.replaceChildren(...rows);
+}
+
+// Form submission: one small JSON request to the model, no page reload
+form.addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const button = submitBtn;
+    button.classList.add('loading');
+    button.innerHTML = '<span>Predicting...</span>';
+
+    const record = {};
+    fields.forEach(field => {
+        record[field.name] = field.type === 'number' ? parseFloat(field.value) : field.value;
+    });
+
+    fetch('/api/predict?explain=1', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(record)
+    })
+        .then(response => response.json().then(body => {
+            if (!response.ok) {
+                throw new Error(body.error || 'Prediction failed');
+            }
+            return body;
+        }))
+        .then(body => {
+            const probability = Math.round(body.probabilities[0] * 100);
+            predictionText.textContent = `${body.predictions[0]} (${probability}% chance of passing)`;
+            // Models without contributions (lookup tables, linear bundles) return null here
+            if (body.contributions) {
+                showExplanation(body.contributions[0]);
+            } else {
+                explanation.replaceChildren();
+            }
+        })
+        .catch(error => {
+            predictionText.textContent = error.message;
+            explanation.replaceChildren();
+        })
+        .finally(() => {
+            result.style.display = 'block';
+            button.classList.remove('loading');
+            button.innerHTML = '<span>Predict Performance</span>';
+        });
+});
+
+// Initial progress update; this also disables the submit button until the form is
+// complete (the markup leaves it enabled so the page still submits without JavaScript)
+updateProgress();
@@ -1,64 +1,265 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-from sklearn.impute import SimpleImputer
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
 from joblib import dump
 
-# Load data
-df = pd.read_csv('student_performance_prediction.csv')
+from drift import DriftMonitor, baseline_skeleton, build_baseline
+from score import chunk_stats
 
-# Drop Student ID (not useful for prediction)
-df = df.drop('Student ID', axis=1)
+CSV_PATH = 'student_performance_prediction.csv'
+MODEL_PATH = 'student_performance_model.joblib'
+TARGET = 'Passed'
+ID_COLUMN = 'Student ID'
+categorical_cols = ['Participation in Extracurricular Activities', 'Parent Education Level']
+numerical_cols = ['Study Hours per Week', 'Attendance Rate', 'Previous Grades']
+# Compact dtypes: float32 numerics (what the trees use internally anyway) and pandas categoricals
+CSV_DTYPES = {**{col: np.float32 for col in numerical_cols}, **{col: 'category' for col in categorical_cols},
+              TARGET: 'category'}
+# Bump whenever preprocess() changes what it produces, so cached matrices are rebuilt
+PREPROCESS_VERSION = 1
+CACHE_DIR = '.preprocess_cache'
 
-# Target variable: drop rows where 'Passed' is nan, and encode Yes/No to 1/0
-df = df[df['Passed'].isin(['Yes', 'No'])]
-df['Passed'] = df['Passed'].map({'Yes': 1, 'No': 0})
 
-# Features and target
-X = df.drop('Passed', axis=1)
-y = df['Passed']
+@contextmanager
+def stage(timings, name):
+    # Wall time per pipeline stage
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
 
-# Identify categorical and numerical columns
-categorical_cols = ['Participation in Extracurricular Activities', 'Parent Education Level']
-numerical_cols = [col for col in X.columns if col not in categorical_cols]
-
-# Preprocessing pipelines
-categorical_transformer = Pipeline([
-    ('imputer', SimpleImputer(strategy='most_frequent')),
-    ('encoder', LabelEncoder())  # Will handle in a loop since LabelEncoder doesn't work with DataFrame
-])
-numerical_transformer = Pipeline([
-    ('imputer', SimpleImputer(strategy='mean'))
-])
-
-# Impute and encode categoricals manually
-for col in categorical_cols:
-    X[col] = X[col].fillna(X[col].mode()[0])
-    X[col] = LabelEncoder().fit_transform(X[col])
-
-# Impute numericals
-for col in numerical_cols:
-    X[col] = X[col].astype(float)
-    X[col] = X[col].fillna(X[col].mean())
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Train model
-model = RandomForestClassifier(random_state=42)
-model.fit(X_train, y_train)
-
-# Save model and columns
-model_bundle = {
-    'model': model,
-    'columns': X.columns.tolist(),
-    'categorical_cols': categorical_cols,
-    'label_encoders': {col: LabelEncoder().fit(df[col].fillna(df[col].mode()[0])) for col in categorical_cols}
-}
-dump(model_bundle, 'student_performance_model.joblib')
-
-print('Model trained and saved as student_performance_model.joblib') 
\ No newline at end of file
+
+def load_data(path=CSV_PATH):
+    # Load data, skipping Student ID (not useful for prediction)
+    return pd.read_csv(path, usecols=numerical_cols + categorical_cols + [TARGET], dtype=CSV_DTYPES)
+
+
+def preprocess(df, impute_values=None, categories=None):
+    # Fits imputation and encoding on df, or applies ones computed beforehand (streaming mode)
+    fit = impute_values is None
+    if fit:
+        impute_values, categories = {}, {}
+
+    # Target variable: drop rows where 'Passed' is nan, and encode Yes/No to 1/0
+    df = df[df[TARGET].isin(['Yes', 'No'])]
+    y = (df[TARGET] == 'Yes').astype(np.int64).rename(TARGET)
+
+    X = pd.DataFrame(index=df.index)
+    for col in numerical_cols:
+        if fit:
+            # Mean imputation, accumulated in float64
+            impute_values[col] = float(np.nanmean(df[col].to_numpy(dtype=np.float64)))
+        X[col] = df[col].fillna(impute_values[col]).astype(np.float32)
+    for col in categorical_cols:
+        values = df[col]
+        if fit:
+            values = values.cat.remove_unused_categories()
+            impute_values[col] = values.mode()[0]
+            categories[col] = sorted(set(values.cat.categories) | {impute_values[col]})
+        # Mode imputation (labels outside the known categories count as missing), then label
+        # encoding straight from the category codes: with sorted categories the codes are
+        # exactly what LabelEncoder would produce
+        values = values.cat.set_categories(categories[col]).fillna(impute_values[col])
+        X[col] = values.cat.codes.astype(np.float32)
+    # Same column order as the raw file
+    X = X[[col for col in df.columns if col != TARGET]]
+    label_encoders = {col: LabelEncoder().fit(np.array(categories[col], dtype=object)) for col in categorical_cols}
+    return X, y, impute_values, label_encoders
+
+
+def category_lists(label_encoders):
+    return {col: encoder.classes_.tolist() for col, encoder in label_encoders.items()}
+
+
+def cache_key(path):
+    # Content hash of the CSV plus everything that shapes the preprocessed output
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    config = {'version': PREPROCESS_VERSION, 'target': TARGET, 'numerical_cols': numerical_cols,
+              'categorical_cols': categorical_cols}
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()[:32]
+
+
+def cache_entry(path=CSV_PATH, cache_dir=CACHE_DIR):
+    # Directory holding X.npy, y.npy and meta.json for this CSV, preprocessed on the first call.
+    # X is stored column-major (one contiguous run per feature); tools that fan work out to
+    # processes hand them these files to memory-map rather than writing another copy.
+    directory = os.path.join(cache_dir, cache_key(path))
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        X, y, impute_values, label_encoders = preprocess(load_data(path))
+        meta = {
+            'source': os.path.abspath(path),
+            'columns': list(X.columns),
+            'impute_values': {col: value if isinstance(value, str) else float(value)
+                              for col, value in impute_values.items()},
+            'categories': category_lists(label_encoders),
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written to a scratch directory and renamed into place, so readers never see half an entry
+        scratch = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            np.save(os.path.join(scratch, 'X.npy'), np.asfortranarray(X.to_numpy(dtype=np.float32)))
+            np.save(os.path.join(scratch, 'y.npy'), y.to_numpy(dtype=np.int64))
+            with open(os.path.join(scratch, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(scratch, directory)
+        except OSError:
+            # Another process published the same entry first
+            shutil.rmtree(scratch, ignore_errors=True)
+            if not os.path.exists(os.path.join(directory, 'meta.json')):
+                raise
+    return directory
+
+
+def load_preprocessed(path=CSV_PATH, cache_dir=CACHE_DIR, mmap_mode='r'):
+    # preprocess(load_data(path)), served from the .npy cache when the CSV and the preprocessing
+    # config are unchanged. X is memory-mapped; encoders are rebuilt from the category lists in meta.json.
+    directory = cache_entry(path, cache_dir)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    X = pd.DataFrame(np.load(os.path.join(directory, 'X.npy'), mmap_mode=mmap_mode), columns=meta['columns'],
+                     copy=False)
+    y = pd.Series(np.load(os.path.join(directory, 'y.npy'), mmap_mode=mmap_mode), name=TARGET, copy=False)
+    label_encoders = {col: LabelEncoder().fit(np.array(classes, dtype=object))
+                      for col, classes in meta['categories'].items()}
+    return X, y, meta['impute_values'], label_encoders
+
+
+def train(X, y, seed=42, n_jobs=-1, **params):
+    # Train/test split and a forest whose trees are built across all cores;
+    # results depend only on the seed, not on n_jobs
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+    model = RandomForestClassifier(random_state=seed, n_jobs=n_jobs, **params)
+    model.fit(X_train, y_train)
+    return model, X_test, y_test
+
+
+def read_chunks(path, chunksize):
+    return pd.read_csv(path, usecols=numerical_cols + categorical_cols + [TARGET], dtype=CSV_DTYPES,
+                       chunksize=chunksize)
+
+
+def streaming_stats(path, chunksize):
+    # One pass over the labelled rows: (impute_values, categories)
+    labelled = (chunk[chunk[TARGET].isin(['Yes', 'No'])] for chunk in read_chunks(path, chunksize))
+    return chunk_stats(labelled, numerical_cols, categorical_cols)
+
+
+def holdout_mask(n_rows, seed, chunk_index, test_size=0.2):
+    # Deterministic per-chunk test split, reproducible on every pass over the file
+    return np.random.default_rng([seed, chunk_index]).random(n_rows) < test_size
+
+
+def train_streaming(path, chunksize, trees_per_chunk=10, seed=42, n_jobs=-1, timings=None):
+    # Out-of-core training: memory is bounded by the chunk size, not the dataset size.
+    # Pass 1 computes imputation statistics, pass 2 grows the forest by trees_per_chunk
+    # trees fitted on each chunk (warm_start), pass 3 scores the held-out rows.
+    timings = {} if timings is None else timings
+    with stage(timings, 'stats'):
+        impute_values, categories = streaming_stats(path, chunksize)
+
+    model = RandomForestClassifier(n_estimators=trees_per_chunk, warm_start=True, random_state=seed, n_jobs=n_jobs)
+    columns = None
+    with stage(timings, 'fit'):
+        for i, chunk in enumerate(read_chunks(path, chunksize)):
+            X, y, _, label_encoders = preprocess(chunk, impute_values, categories)
+            columns = X.columns
+            train_rows = ~holdout_mask(len(X), seed, i)
+            if y[train_rows].nunique() < 2:
+                # Every batch of trees needs both classes to keep classes_ consistent
+                continue
+            if hasattr(model, 'estimators_'):
+                model.set_params(n_estimators=len(model.estimators_) + trees_per_chunk)
+            model.fit(X[train_rows], y[train_rows])
+    if not hasattr(model, 'estimators_'):
+        raise ValueError(f'No chunk of {path} had both classes to train on')
+
+    # The evaluation pass also counts the drift baseline, with bin edges from the first chunk
+    correct = total = 0
+    drift = None
+    with stage(timings, 'evaluate'):
+        for i, chunk in enumerate(read_chunks(path, chunksize)):
+            X, y, _, _ = preprocess(chunk, impute_values, categories)
+            values = X.to_numpy(dtype=np.float32)
+            if drift is None:
+                drift = DriftMonitor(baseline_skeleton(values, columns, categorical_cols, categories), columns,
+                                     categories)
+            drift.add(values)
+            test_rows = holdout_mask(len(X), seed, i)
+            if test_rows.any():
+                correct += int((model.predict(X[test_rows]) == y[test_rows]).sum())
+                total += int(test_rows.sum())
+    accuracy = correct / total if total else float('nan')
+    return model, columns, impute_values, label_encoders, accuracy, drift.to_baseline()
+
+
+def make_bundle(model, columns, impute_values, label_encoders, drift_baseline=None):
+    # Model, columns and encoders in the format app.py loads
+    bundle = {
+        'model': model,
+        'columns': list(columns),
+        'categorical_cols': categorical_cols,
+        'label_encoders': label_encoders,
+        # Fill values used above, so scoring tools can impute new data the same way
+        'impute_values': impute_values,
+    }
+    if drift_baseline is not None:
+        # Training input distribution the app compares served rows against (see drift.py)
+        bundle['drift_baseline'] = drift_baseline
+    return bundle
+
+
+def main(args):
+    timings = {}
+    if args.streaming:
+        model, columns, impute_values, label_encoders, accuracy, drift_baseline = train_streaming(
+            args.csv, args.chunksize, args.trees_per_chunk, seed=args.seed, n_jobs=args.n_jobs, timings=timings)
+    else:
+        with stage(timings, 'preprocess'):
+            if args.no_cache:
+                X, y, impute_values, label_encoders = preprocess(load_data(args.csv))
+            else:
+                X, y, impute_values, label_encoders = load_preprocessed(args.csv, args.cache_dir)
+            columns = X.columns
+        with stage(timings, 'fit'):
+            model, X_test, y_test = train(X, y, seed=args.seed, n_jobs=args.n_jobs)
+        with stage(timings, 'evaluate'):
+            accuracy = model.score(X_test, y_test)
+            drift_baseline = build_baseline(X.to_numpy(dtype=np.float32), list(columns), categorical_cols,
+                                            category_lists(label_encoders))
+    with stage(timings, 'save'):
+        dump(make_bundle(model, columns, impute_values, label_encoders, drift_baseline), args.output)
+
+    print(f'Model trained and saved as {args.output} '
+          f'({len(model.estimators_)} trees, test accuracy {accuracy:.4f})')
+    for name, seconds in timings.items():
+        print(f'  {name:<10} {seconds:8.3f}s')
+    print(f"  {'total':<10} {sum(timings.values()):8.3f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the student performance model')
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--output', default=MODEL_PATH)
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the split and the forest')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Cores used to build trees (-1 = all)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Where preprocessed matrices are cached')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-read and re-preprocess the CSV')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Out-of-core mode for datasets larger than memory')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='Rows per chunk in streaming mode')
+    parser.add_argument('--trees-per-chunk', type=int, default=10, help='Trees added per chunk in streaming mode')
+    main(parser.parse_args())
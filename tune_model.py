@@ -0,0 +1,194 @@
+import argparse
+import io
+import itertools
+import math
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed, dump
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+from forest import predictor_from_bundle
+from drift import build_baseline
+from train_model import CSV_PATH, cache_entry, categorical_cols, category_lists, load_preprocessed, make_bundle, stage
+
+# Hyperparameter search that produces student_performance_model_optimized.joblib.
+#
+#   python tune_model.py --candidates 81 --max-size-kb 400 --max-latency-ms 1.0
+#
+# The CSV is preprocessed once (or loaded from train_model's preprocessing cache) and every
+# worker memory-maps the cache entry's .npy files. Random forest configurations are sampled from PARAM_SPACE and compared by
+# successive halving: each round fits the survivors on eta times more training rows and
+# keeps the best 1/eta by validation accuracy. Candidates over the model size budget
+# (compressed bundle bytes) or the single-row latency budget (p99 of the app's predictor,
+# timed serially after each round's parallel fits) are ranked below every candidate that
+# fits. The winner is refitted on train+validation, checked on the test split and saved
+# in the bundle format app.py loads.
+
+OUTPUT_PATH = 'student_performance_model_optimized.joblib'
+MODEL_TYPE = 'RandomForest'
+PARAM_SPACE = {
+    'n_estimators': [10, 25, 50, 100, 200],
+    'max_depth': [4, 6, 8, 10, 12, 16, None],
+    'min_samples_leaf': [1, 2, 5, 10, 25],
+    'min_samples_split': [2, 10, 50],
+    'max_features': ['sqrt', 0.6, None],
+    'criterion': ['gini', 'entropy'],
+}
+
+
+def sample_configs(n, seed):
+    # n distinct configurations drawn uniformly from the grid
+    grid = list(itertools.product(*PARAM_SPACE.values()))
+    picks = np.random.default_rng(seed).choice(len(grid), size=min(n, len(grid)), replace=False)
+    return [dict(zip(PARAM_SPACE, grid[i])) for i in picks]
+
+
+def cached_arrays(csv_path):
+    # The preprocessing cache entry's files; workers open these read-only with mmap instead of receiving copies
+    directory = cache_entry(csv_path)
+    return {'X': os.path.join(directory, 'X.npy'), 'y': os.path.join(directory, 'y.npy')}
+
+
+def bundle_size(bundle):
+    # Bytes on disk, compressed like the shipped bundle
+    buffer = io.BytesIO()
+    dump(bundle, buffer, compress=3)
+    return buffer.tell()
+
+
+def single_row_latency(bundle, rows, repeat=200):
+    # p99 of one-row predict_proba calls through the predictor the app serves with
+    predictor = predictor_from_bundle(bundle)
+    samples = []
+    for i in range(repeat):
+        row = rows[i % len(rows)][None, :]
+        start = time.perf_counter()
+        predictor.predict_proba(row)
+        samples.append(time.perf_counter() - start)
+    return float(np.percentile(samples, 99)) * 1000
+
+
+def evaluate(config, n_rows, cache, train_idx, val_idx, meta, seed):
+    # Runs in a worker: fit and score one candidate. Latency is timed afterwards in the
+    # parent (measure_latency), not here where other candidates compete for the cores
+    X = np.load(cache['X'], mmap_mode='r')
+    y = np.load(cache['y'], mmap_mode='r')
+    # train_idx is shuffled, so a prefix is a random subsample
+    rows = np.sort(train_idx[:n_rows])
+    model = RandomForestClassifier(random_state=seed, n_jobs=1, **config)
+    start = time.perf_counter()
+    model.fit(X[rows], y[rows])
+    fit_seconds = time.perf_counter() - start
+    X_val = np.asarray(X[val_idx])
+    result = {
+        'config': config,
+        'rows': int(n_rows),
+        'accuracy': float(model.score(X_val, y[val_idx])),
+        'size_kb': bundle_size(make_bundle(model, **meta)) / 1024,
+        'fit_seconds': fit_seconds,
+    }
+    return result, model
+
+
+def measure_latency(outcomes, X_val, meta):
+    # One candidate at a time in the parent, so p99 is not inflated by concurrent fits
+    results = []
+    for result, model in outcomes:
+        result['latency_ms'] = single_row_latency(make_bundle(model, **meta), X_val)
+        results.append(result)
+    return results
+
+
+def within_budget(result, max_size_kb, max_latency_ms):
+    return ((max_size_kb is None or result['size_kb'] <= max_size_kb)
+            and (max_latency_ms is None or result['latency_ms'] <= max_latency_ms))
+
+
+def rank(results, max_size_kb, max_latency_ms):
+    # Candidates within budget first, then by accuracy; over-budget ones by accuracy too,
+    # so the search still converges when nothing fits
+    return sorted(results, key=lambda r: (within_budget(r, max_size_kb, max_latency_ms), r['accuracy']), reverse=True)
+
+
+def successive_halving(configs, cache, train_idx, val_idx, meta, eta=3, min_rows=500, n_jobs=-1, seed=42,
+                       max_size_kb=None, max_latency_ms=None):
+    n_rounds = max(1, int(math.log(len(configs), eta)) + 1)
+    survivors = configs
+    X_val = np.load(cache['X'], mmap_mode='r')[val_idx]
+    history = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for round_index in range(n_rounds):
+            # The last round always trains on every training row
+            n_rows = max(min_rows, int(len(train_idx) / eta ** (n_rounds - 1 - round_index)))
+            n_rows = min(n_rows, len(train_idx))
+            outcomes = parallel(delayed(evaluate)(config, n_rows, cache, train_idx, val_idx, meta, seed)
+                                for config in survivors)
+            results = rank(measure_latency(outcomes, X_val, meta), max_size_kb, max_latency_ms)
+            history.append(results)
+            best = results[0]
+            print(f'round {round_index + 1}/{n_rounds}: {len(results):3d} candidates on {n_rows:6d} rows, '
+                  f"best accuracy {best['accuracy']:.4f} ({best['size_kb']:.0f} KB, {best['latency_ms']:.3f} ms)",
+                  flush=True)
+            survivors = [r['config'] for r in results[:max(1, math.ceil(len(results) / eta))]]
+    return history[-1][0], history
+
+
+def main(args):
+    timings = {}
+    with stage(timings, 'preprocess'):
+        X, y, impute_values, label_encoders = load_preprocessed(args.csv)
+    drift_baseline = build_baseline(X.to_numpy(dtype=np.float32), list(X.columns), categorical_cols,
+                                    category_lists(label_encoders))
+    meta = {'columns': X.columns, 'impute_values': impute_values, 'label_encoders': label_encoders,
+            'drift_baseline': drift_baseline}
+
+    # Same test split as train_model.py; validation is carved out of the training part
+    indices = np.arange(len(X))
+    train_idx, test_idx = train_test_split(indices, test_size=0.2, random_state=args.seed)
+    train_idx, val_idx = train_test_split(train_idx, test_size=0.25, random_state=args.seed)
+    val_idx = np.sort(val_idx)
+
+    configs = sample_configs(args.candidates, args.seed)
+    cache = cached_arrays(args.csv)
+    with stage(timings, 'search'):
+        best, _ = successive_halving(configs, cache, train_idx, val_idx, meta, eta=args.eta,
+                                     min_rows=args.min_rows, n_jobs=args.n_jobs, seed=args.seed,
+                                     max_size_kb=args.max_size_kb, max_latency_ms=args.max_latency_ms)
+
+    with stage(timings, 'refit'):
+        X_values = X.to_numpy(dtype=np.float32)
+        y_values = y.to_numpy()
+        fit_idx = np.sort(np.concatenate([train_idx, val_idx]))
+        model = RandomForestClassifier(random_state=args.seed, n_jobs=args.n_jobs, **best['config'])
+        model.fit(X_values[fit_idx], y_values[fit_idx])
+        model.set_params(n_jobs=1)
+        accuracy = model.score(X_values[test_idx], y_values[test_idx])
+        bundle = {**make_bundle(model, **meta), 'model_type': MODEL_TYPE}
+        size_kb = bundle_size(bundle) / 1024
+        latency_ms = single_row_latency(bundle, X_values[test_idx], repeat=1000)
+    with stage(timings, 'save'):
+        dump(bundle, args.output, compress=3)
+
+    print(f"Best configuration: {best['config']}")
+    print(f'Saved {args.output}: test accuracy {accuracy:.4f}, {size_kb:.0f} KB, p99 single-row {latency_ms:.3f} ms')
+    if not within_budget({'size_kb': size_kb, 'latency_ms': latency_ms}, args.max_size_kb, args.max_latency_ms):
+        print('Warning: the saved model is over the size/latency budget (no candidate fit it, or the refit grew)')
+    for name, seconds in timings.items():
+        print(f'  {name:<10} {seconds:8.3f}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune the forest and write the optimized bundle')
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--candidates', type=int, default=81, help='Configurations sampled for the first round')
+    parser.add_argument('--eta', type=int, default=3, help='Survivors per round are 1/eta of the candidates')
+    parser.add_argument('--min-rows', type=int, default=500, help='Training rows in the first round')
+    parser.add_argument('--max-size-kb', type=float, help='Budget on the compressed bundle size')
+    parser.add_argument('--max-latency-ms', type=float, help='Budget on p99 single-row predict latency')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Candidates evaluated in parallel (-1 = all cores)')
+    main(parser.parse_args())
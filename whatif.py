@@ -0,0 +1,147 @@
+import numpy as np
+
+# What-if sweeps for one student: vary one or two features over a grid, score every grid
+# point in a single predict_proba call and report the pass-probability curve (or surface)
+# plus the smallest change that flips the prediction.
+#
+# Each varied feature takes a grid spec:
+#   [v1, v2, ...]                      explicit values (labels for categoricals)
+#   {"min": 0, "max": 40, "steps": 41} evenly spaced numbers (missing keys use DEFAULT_RANGES)
+#   null                               the default range, or every label of a categorical
+#
+# "Smallest" is measured per feature as the move across its grid span (a categorical
+# change counts as a full span), summed over the varied features.
+
+DEFAULT_RANGES = {
+    'Study Hours per Week': (0.0, 40.0),
+    'Attendance Rate': (0.0, 100.0),
+    'Previous Grades': (0.0, 100.0),
+}
+DEFAULT_STEPS = 41
+MAX_FEATURES = 2
+MAX_STEPS = 1000
+MAX_CELLS = 10_000
+
+
+def grid_length(encoder, col, spec):
+    # Number of values a grid spec asks for, checked before any array is built
+    if isinstance(spec, list):
+        length = len(spec)
+    elif spec is None:
+        length = len(encoder.categories[col]) if col in encoder.categorical_cols else DEFAULT_STEPS
+    elif isinstance(spec, dict) and col not in encoder.categorical_cols:
+        try:
+            length = int(spec.get('steps', DEFAULT_STEPS))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f'{col}: steps must be an integer') from None
+    else:
+        # Malformed; grid_values reports it
+        return 1
+    if length > MAX_STEPS:
+        raise ValueError(f'{col}: at most {MAX_STEPS} grid values')
+    return length
+
+
+def grid_values(encoder, col, spec):
+    # (values as reported, encoded float64 column values) for one varied feature
+    if col in encoder.categorical_cols:
+        labels = encoder.categories[col] if spec is None else spec
+        if not isinstance(labels, list) or not labels:
+            raise ValueError(f'{col}: expected a list of labels')
+        unknown = [label for label in labels if label not in encoder.categories[col]]
+        if unknown:
+            raise ValueError(f'{col}: unknown labels {unknown!r}')
+        return list(labels), np.array([encoder.categories[col].index(label) for label in labels], dtype=np.float64)
+    if isinstance(spec, list):
+        try:
+            values = np.array(spec, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f'{col}: expected a list of numbers') from None
+        if values.ndim != 1 or not len(values) or not np.isfinite(values).all():
+            raise ValueError(f'{col}: expected a non-empty list of finite numbers')
+    elif spec is None or isinstance(spec, dict):
+        spec = spec or {}
+        low, high = DEFAULT_RANGES.get(col, (None, None))
+        try:
+            low = float(spec.get('min', low))
+            high = float(spec.get('max', high))
+            steps = int(spec.get('steps', DEFAULT_STEPS))
+        except (TypeError, ValueError):
+            raise ValueError(f'{col}: min and max must be numbers and steps an integer') from None
+        if not (np.isfinite(low) and np.isfinite(high)) or high < low or steps < 1:
+            raise ValueError(f'{col}: need finite min <= max and steps >= 1')
+        values = np.linspace(low, high, steps)
+    else:
+        raise ValueError(f'{col}: expected a list of values, a {{"min", "max", "steps"}} object or null')
+    return values.tolist(), values
+
+
+def sweep(serving, record, vary):
+    # Body for one sweep; raises ValueError on bad input (unknown feature, oversized grid, ...)
+    encoder = serving.encoder
+    if not isinstance(vary, dict) or not 1 <= len(vary) <= MAX_FEATURES:
+        raise ValueError(f'"vary" must name 1 to {MAX_FEATURES} features')
+    features = list(vary)
+    unknown = [col for col in features if col not in encoder.columns]
+    if unknown:
+        raise ValueError(f'Unknown features: {", ".join(map(str, unknown))}')
+    n_cells = 1
+    for col in features:
+        n_cells *= grid_length(encoder, col, vary[col])
+    if n_cells > MAX_CELLS:
+        raise ValueError(f'Grid has {n_cells} points, at most {MAX_CELLS} are allowed')
+    grids = [grid_values(encoder, col, vary[col]) for col in features]
+    shape = tuple(len(encoded) for _, encoded in grids)
+    n_cells = int(np.prod(shape))
+
+    # Every grid point is the student's row with the varied columns overwritten; the
+    # unchanged row goes last so the current prediction comes from the same call
+    base = encoder.encode_row(record)
+    X = np.empty((n_cells + 1, len(encoder.columns)), dtype=np.float32)
+    X[:] = base
+    indices = [encoder.columns.index(col) for col in features]
+    mesh = np.meshgrid(*[encoded for _, encoded in grids], indexing='ij')
+    for j, values in zip(indices, mesh):
+        X[:n_cells, j] = values.ravel()
+
+    proba = serving.predictor.predict_proba(X)
+    passed = serving.predictor.classes_.take(proba.argmax(axis=1)) == 1
+    pass_probability = proba[:, serving.pass_index]
+    current_pass = bool(passed[-1])
+
+    # Distance of every grid point from the student's current values
+    distance = np.zeros(n_cells)
+    for col, j, values, (_, encoded) in zip(features, indices, mesh, grids):
+        values = values.ravel()
+        if col in encoder.categorical_cols:
+            distance += values != base[j]
+        else:
+            span = encoded.max() - encoded.min()
+            distance += np.abs(values - base[j]) / (span if span > 0 else 1.0)
+
+    minimal_change = None
+    flipped = np.flatnonzero(passed[:n_cells] != current_pass)
+    if len(flipped):
+        # Closest flip; among equally close ones, the most decisive
+        margin = np.abs(pass_probability[flipped] - 0.5)
+        best = flipped[np.lexsort((-margin, distance[flipped]))[0]]
+        position = np.unravel_index(best, shape)
+        # Only the features the grid point actually moves (a feature can stay at the student's value)
+        minimal_change = {
+            'changes': {col: reported[i] for col, j, (reported, _), i in zip(features, indices, grids, position)
+                        if X[best, j] != base[j]},
+            'prediction': 'Fail' if current_pass else 'Pass',
+            'probability': float(pass_probability[best]),
+        }
+    return {
+        'features': features,
+        'values': [reported for reported, _ in grids],
+        # Pass probability per grid point: a list for one feature, rows over the first feature for two
+        'probabilities': pass_probability[:n_cells].reshape(shape).tolist(),
+        'current': {
+            'values': {col: record[col] for col in features},
+            'prediction': 'Pass' if current_pass else 'Fail',
+            'probability': float(pass_probability[-1]),
+        },
+        'minimal_change': minimal_change,
+    }